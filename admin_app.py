@@ -4,19 +4,82 @@ Streamlit-based admin dashboard for managing users, posts, and analytics
 """
 
 import streamlit as st
-import pandas as pd
 import os
 import sys
-from datetime import datetime, timedelta
-import json
+import io
+import hashlib
+import hmac
+import html
+from datetime import date, datetime, timedelta
+from pathlib import Path
 
 # Ensure we can import from shared_utils when app is at repo root
-sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+_BASE_DIR = Path(__file__).resolve().parent
+sys.path.append(str(_BASE_DIR))
 
+# Page configuration
+st.set_page_config(
+    page_title="Admin Dashboard - LinkedIn Post Generator",
+    page_icon="⚙️",
+    layout="wide",
+    initial_sidebar_state="expanded"
+)
+
+# Admin authentication (simple - in production, use proper auth)
+if 'admin_authenticated' not in st.session_state:
+    st.session_state.admin_authenticated = False
+
+# Simple password check (in production, use proper authentication)
+@st.cache_resource(show_spinner=False)
+def _admin_password_hash():
+    """Parsed ADMIN_PASSWORD_HASH as (iterations, salt, digest), or None; read once per process"""
+    # ADMIN_PASSWORD_HASH ("pbkdf2_sha256$<iterations>$<salt hex>$<digest hex>") takes precedence
+    # so the plaintext needn't be stored; raises ValueError when the secret is malformed
+    password_hash = os.getenv('ADMIN_PASSWORD_HASH', '').strip()
+    if not password_hash:
+        return None
+    algorithm, iterations, salt_hex, digest_hex = password_hash.split('$')
+    if algorithm != 'pbkdf2_sha256':
+        raise ValueError(f"unsupported algorithm {algorithm!r}")
+    return int(iterations), bytes.fromhex(salt_hex), bytes.fromhex(digest_hex)
+
+def _verify_admin_password(password):
+    """Constant-time check of a login attempt against the configured admin password"""
+    password_hash = _admin_password_hash()
+    if password_hash is None:
+        admin_password = os.getenv('ADMIN_PASSWORD', 'admin123')  # Change in production
+        return hmac.compare_digest(password.encode(), admin_password.encode())
+    iterations, salt, digest = password_hash
+    return hmac.compare_digest(hashlib.pbkdf2_hmac('sha256', password.encode(), salt, iterations), digest)
+
+# Authentication
+if not st.session_state.admin_authenticated:
+    st.title("🔐 Admin Login")
+    try:
+        _admin_password_hash()
+    except ValueError:
+        st.error("⚠️ ADMIN_PASSWORD_HASH is malformed - expected pbkdf2_sha256$<iterations>$<salt hex>$<digest hex>")
+        st.stop()
+    # Form so typing the password doesn't rerun the script on every keystroke
+    with st.form("admin_login_form"):
+        password = st.text_input("Enter Admin Password", type="password")
+        submitted = st.form_submit_button("Login")
+    if submitted:
+        if _verify_admin_password(password):
+            st.session_state.admin_authenticated = True
+            st.rerun()
+        else:
+            st.error("❌ Incorrect password")
+    st.stop()
+
+# The data and config layers are imported after the login gate so the login page (and every
+# failed attempt) doesn't pay for them; pandas is imported by the pages that use it
+from shared_utils.config_loader import load_customer_config, save_customer_config
 from shared_utils.data_manager import (
     get_all_posts, 
+    count_posts,
     get_user_stats, 
-    get_all_users,
+    get_user_stats_bulk,
     delete_post,
     get_analytics_data,
     get_all_auth_users,
@@ -27,69 +90,269 @@ from shared_utils.data_manager import (
     update_user_tier,
     update_user_role,
     update_user_company,
-    get_user,
     create_company,
-    get_company,
     get_all_companies,
     update_company_subscription,
+    update_company_branding,
     enable_disable_company,
     delete_company,
-    get_company_users,
-    is_subscription_active
+    is_company_subscription_active,
+    sync_logo_to_github,
+    COMPANIES_FILE,
+    POSTS_FILE,
+    AUTH_FILE
 )
-from shared_utils.config_loader import load_customer_config, save_customer_config
 
-# Page configuration
-st.set_page_config(
-    page_title="Admin Dashboard - LinkedIn Post Generator",
-    page_icon="⚙️",
-    layout="wide",
-    initial_sidebar_state="expanded"
-)
+# Number of rows shown per page in Post Management
+POSTS_PAGE_SIZE = 50
 
-# Admin authentication (simple - in production, use proper auth)
-if 'admin_authenticated' not in st.session_state:
-    st.session_state.admin_authenticated = False
+# Post Management date filter choices -> look-back in days (None = no cutoff)
+POST_DATE_RANGES = {"All Time": None, "Last 7 Days": 7, "Last 30 Days": 30}
 
-# Simple password check (in production, use proper authentication)
-ADMIN_PASSWORD = os.getenv('ADMIN_PASSWORD', 'admin123')  # Change in production
+# Default subscription length per plan, used for the new company expiration date
+SUBSCRIPTION_PERIODS = {'monthly': timedelta(days=30), 'annual': timedelta(days=365)}
 
-# Authentication
-if not st.session_state.admin_authenticated:
-    st.title("🔐 Admin Login")
-    password = st.text_input("Enter Admin Password", type="password")
-    if st.button("Login"):
-        if password == ADMIN_PASSWORD:
-            st.session_state.admin_authenticated = True
-            st.rerun()
-        else:
-            st.error("❌ Incorrect password")
-    st.stop()
+# User tier and role choices, with option -> selectbox index maps
+TIER_OPTIONS = ["Basic", "Standard", "Premium"]
+TIER_INDEX = {tier: i for i, tier in enumerate(TIER_OPTIONS)}
+ROLE_OPTIONS = ["Admin", "User", "Viewer"]
+ROLE_INDEX = {role: i for i, role in enumerate(ROLE_OPTIONS)}
 
-# Load customer configuration
-try:
-    customer_config = load_customer_config()
-    customer_name = customer_config.get('customer_name', 'LinkedIn Post Generator')
-    button_color = customer_config.get('button_color', '#17A2B8')
-    # Get customer-specific logo path from config, or use default
-    configured_logo_path = customer_config.get('logo_path', 'static/logo.png')
-except Exception as e:
-    customer_name = "LinkedIn Post Generator"
-    button_color = '#17A2B8'
-    configured_logo_path = 'static/logo.png'
+# Lists up to this size are rendered with st.table instead of a full DataFrame
+SMALL_TABLE_ROWS = 20
 
-# Get logo path - use customer-specific logo if configured, otherwise default
-_base_dir = os.path.dirname(os.path.abspath(__file__))
-_logo_path = os.path.join(_base_dir, configured_logo_path)
-_logo_exists = os.path.exists(_logo_path)
+# Fixed display columns for tables
+RECENT_POST_COLUMNS = ['date', 'user_id', 'topic', 'post_goal']
+POST_DISPLAY_COLUMNS = ['date', 'user_id', 'topic', 'post_goal', 'post_length']
+COMPANY_DISPLAY_COLUMNS = ['id', 'name', 'subscription_type', 'start_date', 'expiration_date',
+                           'created_date', 'enabled']
+USER_DISPLAY_COLUMNS = ['username', 'email', 'company_id', 'tier', 'role', 'enabled',
+                        'created_date', 'last_login', 'post_count']
+COMPANY_USER_COLUMNS = ['username', 'email', 'tier', 'role', 'enabled']
+POST_CATEGORY_COLUMNS = ['user_id', 'post_goal', 'post_length', 'tone_intensity', 'language_style', 'formatting']
 
-# If customer logo doesn't exist, try default logo as fallback
-if not _logo_exists and configured_logo_path != 'static/logo.png':
-    _logo_path = os.path.join(_base_dir, "static", "logo.png")
-    _logo_exists = os.path.exists(_logo_path)
+# Cached data loaders - Streamlit reruns the whole script on every widget interaction,
+# so repeated reads within the TTL are served from st.cache_data instead of data_manager
+@st.cache_data(ttl=60, show_spinner=False)
+def _cached_all_posts(limit=None, fields=None):
+    """Get all posts, optionally projected to a tuple of fields (cached)"""
+    return get_all_posts(limit=limit, fields=fields)
 
-# Custom CSS for Admin
-st.markdown(f"""
+def _file_version(path):
+    """A data file's modification time, used as a cache key (0 if the file doesn't exist yet)"""
+    return path.stat().st_mtime_ns if path.exists() else 0
+
+@st.cache_data(max_entries=16, show_spinner=False)
+def _user_stats_version(user_id, version):
+    """Get user statistics (cached per posts/auth file version and day)"""
+    return get_user_stats(user_id=user_id)
+
+def _cached_user_stats(user_id=None):
+    """Get user statistics - recomputed only when posts.json or auth.json change, or the day rolls over"""
+    # The today/week counts depend on the date as well as the files
+    version = (_file_version(POSTS_FILE), _file_version(AUTH_FILE), date.today().isoformat())
+    return _user_stats_version(user_id, version)
+
+@st.cache_data(ttl=60, show_spinner=False)
+def _cached_user_stats_bulk(user_ids):
+    """Get per-user statistics for all listed users in one call (cached)"""
+    return get_user_stats_bulk(list(user_ids))
+
+@st.cache_data(ttl=60, show_spinner=False)
+def _cached_auth_users():
+    """Get all users from auth.json (cached)"""
+    return get_all_auth_users()
+
+@st.cache_data(ttl=60, show_spinner=False)
+def _cached_users_by_name():
+    """Users from auth.json keyed by username (cached)"""
+    return {u['username']: u for u in _cached_auth_users() if u.get('username')}
+
+@st.cache_data(max_entries=1, show_spinner=False)
+def _cached_companies_version(version):
+    """Get all companies (cached per companies.json modification time)"""
+    return get_all_companies()
+
+@st.cache_data(max_entries=1, show_spinner=False)
+def _companies_by_id_version(version):
+    """Companies keyed by ID (cached per companies.json modification time)"""
+    return {c['id']: c for c in _cached_companies_version(version)}
+
+def _cached_all_companies():
+    """Get all companies - re-read only when companies.json has changed on disk"""
+    # One stat per call instead of a TTL: edits from any process show up at once, and an
+    # unchanged file is never re-parsed just because the TTL ran out
+    return _cached_companies_version(_file_version(COMPANIES_FILE))
+
+def _cached_companies_by_id():
+    """Companies keyed by ID - rebuilt only when companies.json has changed on disk"""
+    return _companies_by_id_version(_file_version(COMPANIES_FILE))
+
+def _cached_company(company_id):
+    """Get a company by ID - a dict lookup instead of get_company's scan of the list"""
+    return _cached_companies_by_id().get(company_id)
+
+@st.cache_data(max_entries=1, show_spinner=False)
+def _company_choices_version(version):
+    """Company selectbox options, labels and index map (cached per companies.json modification time)"""
+    companies = _cached_companies_version(version)
+    company_options = [None] + [c['id'] for c in companies]
+    company_labels = ["No Company"] + [f"{c['id']} - {c['name']}" for c in companies]
+    company_index = {company_id: i for i, company_id in enumerate(company_options)}
+    return company_options, company_labels, company_index
+
+def _company_choices():
+    """Company selectbox options (None first for "No Company"), their labels and an id -> index map"""
+    return _company_choices_version(_file_version(COMPANIES_FILE))
+
+@st.cache_data(ttl=60, show_spinner=False)
+def _cached_analytics():
+    """Get analytics aggregates (cached) - without the raw all_posts list"""
+    # cache_data unpickles the value on every hit; the page never reads all_posts (the export uses
+    # _cached_all_posts), so keep only the small aggregate dicts in this entry
+    analytics = get_analytics_data()
+    analytics.pop('all_posts', None)
+    return analytics
+
+@st.cache_data(ttl=60, show_spinner=False)
+def _analytics_frames():
+    """Build the Analytics chart DataFrames once per cached analytics result"""
+    analytics = _cached_analytics()
+    
+    def counts_frame(counts):
+        return pd.Series(counts, name='Posts', dtype='int64').to_frame()
+    
+    time_frame = counts_frame(analytics.get('posts_over_time', {}))
+    # Keys are YYYY-MM-DD day prefixes - an explicit format skips per-element format inference
+    time_frame.index = pd.to_datetime(time_frame.index, errors='coerce', format='%Y-%m-%d')
+    return {
+        'goal': counts_frame(analytics.get('posts_by_goal', {})),
+        'length': counts_frame(analytics.get('posts_by_length', {})),
+        'time': time_frame,
+        'template': counts_frame(analytics.get('template_usage', {})),
+    }
+
+def _posts_fingerprint(posts):
+    """Cheap change-detection key for a posts list (length plus first/last records)"""
+    if not posts:
+        return (0, None, None, None, None)
+    return (len(posts), posts[0].get('id'), posts[0].get('date'), posts[-1].get('id'), posts[-1].get('date'))
+
+@st.cache_data(ttl=60, show_spinner=False)
+def _cached_posts_dataframe(fingerprint, _posts):
+    """Build the Arrow-backed posts DataFrame once per posts fingerprint"""
+    df = pd.DataFrame(_posts)
+    # Arrow-backed columns are smaller than object dtype and serialize to st.dataframe without conversion
+    df = df.convert_dtypes(dtype_backend='pyarrow')
+    # Low-cardinality fields repeat a handful of values - store them as categories (codes + one copy of each value)
+    category_columns = [col for col in POST_CATEGORY_COLUMNS if col in df.columns]
+    df[category_columns] = df[category_columns].astype('category')
+    return df
+
+@st.cache_data(ttl=60, show_spinner=False)
+def _post_filter_options():
+    """Post count plus user and goal option lists (with "All" first) for the Post Management filters"""
+    # Only the two filter fields are projected - the posts themselves are fetched a page at a time
+    posts = _cached_all_posts(fields=('user_id', 'post_goal'))
+    users = sorted({p['user_id'] for p in posts if p['user_id'] is not None})
+    goals = sorted({p['post_goal'] for p in posts if p['post_goal'] is not None})
+    return len(posts), ["All", *users], ["All", *goals]
+
+@st.cache_data(ttl=60, show_spinner=False)
+def _analytics_csv_bytes(fingerprint, _df):
+    """Serialize the posts DataFrame to CSV bytes once per posts fingerprint"""
+    # pyarrow ships with Streamlit; its C++ CSV writer takes the Arrow-backed columns as-is
+    import pyarrow as pa
+    import pyarrow.csv as pa_csv
+    
+    buf = io.BytesIO()
+    try:
+        pa_csv.write_csv(pa.Table.from_pandas(_df, preserve_index=False), buf)
+    except (pa.ArrowInvalid, pa.ArrowNotImplementedError, pa.ArrowTypeError):
+        # Columns Arrow can't write as CSV (e.g. nested values) - fall back to pandas
+        buf = io.BytesIO()
+        _df.to_csv(buf, index=False, chunksize=10_000, encoding='utf-8')
+    return buf.getvalue()
+
+def _records_frame(records, columns, dtypes=None):
+    """DataFrame of the given fields of records (missing ones empty), with optional dtypes (column -> dtype)"""
+    df = pd.DataFrame.from_records(records, columns=columns)
+    return df.astype(dtypes) if dtypes else df
+
+def _render_post_rows(posts, columns):
+    """Render posts already projected to columns (get_all_posts(fields=...)) - small lists skip the DataFrame"""
+    if len(posts) <= SMALL_TABLE_ROWS:
+        # The loader built each row with exactly these keys in this order - nothing to re-project
+        st.table(posts)
+    else:
+        st.dataframe(_records_frame(posts, columns).convert_dtypes(dtype_backend='pyarrow'),
+                     hide_index=True, use_container_width=True)
+
+def _parse_date_columns(df, columns, date_only=False):
+    """Parse the given ISO date columns of df to datetimes in place (unparseable dates become empty)
+
+    date_only: only the YYYY-MM-DD prefix is needed - slice it and parse with a fixed format
+    instead of inferring the full ISO8601 layout (time and offset) of each value
+    """
+    columns = [col for col in columns if col in df.columns]
+    if not columns:
+        return
+    if date_only:
+        for col in columns:
+            df[col] = pd.to_datetime(df[col].astype('string').str[:10], errors='coerce', format='%Y-%m-%d')
+    else:
+        df[columns] = df[columns].apply(pd.to_datetime, errors='coerce', format='ISO8601')
+
+def _parse_iso_date(value):
+    """Date part of an ISO date or datetime string"""
+    # The date is always the first 10 characters - parse just that, no split or datetime
+    return date.fromisoformat(value[:10])
+
+def _clear_user_caches():
+    """Invalidate cached user data after a mutation"""
+    # User stats need no clearing - they are keyed on the auth.json/posts.json modification times
+    _cached_auth_users.clear()
+    _cached_users_by_name.clear()
+
+def _clear_company_caches():
+    """Invalidate cached company data after a mutation"""
+    _cached_companies_version.clear()
+    _companies_by_id_version.clear()
+    _company_choices_version.clear()
+
+def _clear_post_caches():
+    """Invalidate cached post-derived data after a mutation"""
+    _cached_all_posts.clear()
+    _cached_user_stats_bulk.clear()
+    _cached_analytics.clear()
+    _analytics_frames.clear()
+    _cached_posts_dataframe.clear()
+    _post_filter_options.clear()
+    _analytics_csv_bytes.clear()
+
+@st.cache_resource(show_spinner=False)
+def _get_customer_config():
+    """Customer configuration singleton - cleared after the admin saves a new config"""
+    return load_customer_config()
+
+@st.cache_resource(max_entries=32, show_spinner=False)
+def _load_logo_bytes(path, mtime_ns):
+    """Read logo file bytes once per path and modification time"""
+    with open(path, 'rb') as f:
+        return f.read()
+
+def _logo_bytes(path):
+    """Bytes of the logo file at path, or None if it can't be read - re-read only after the file changes"""
+    # Keyed on mtime so a logo uploaded over the same path isn't served stale; one stat per call
+    try:
+        return _load_logo_bytes(str(path), os.stat(path).st_mtime_ns)
+    except OSError:
+        return None
+
+@st.cache_data(show_spinner=False)
+def _build_css(button_color):
+    """Build the admin CSS block for a given button color"""
+    return f"""
     <style>
         .stButton > button {{
             background-color: {button_color};
@@ -126,41 +389,664 @@ st.markdown(f"""
             box-shadow: 0 2px 4px rgba(0,0,0,0.1);
             border-left: 4px solid {button_color};
         }}
+        .metric-row {{
+            display: grid;
+            grid-template-columns: repeat(auto-fit, minmax(150px, 1fr));
+            gap: 16px;
+            margin-bottom: 20px;
+        }}
+        .metric-label {{
+            font-size: 0.9rem;
+            color: #555;
+        }}
+        .metric-value {{
+            font-size: 2rem;
+            font-weight: 600;
+        }}
     </style>
-""", unsafe_allow_html=True)
+"""
+
+@st.cache_data(show_spinner=False)
+def _build_header_html(customer_name, with_banner=True):
+    """Build the admin header HTML - the gradient banner is omitted when shown beside the logo"""
+    header_text = f"""
+            <div class="admin-header-text">
+                <h1>⚙️ Admin Dashboard - {customer_name}</h1>
+                <p>Manage users, posts, and view analytics</p>
+            </div>"""
+    if not with_banner:
+        return header_text
+    return f"""
+        <div class="admin-header">{header_text}
+        </div>
+    """
+
+@st.cache_data(ttl=60, show_spinner=False)
+def _resolve_logo_path(configured_logo_path):
+    """Header logo file - the configured logo, else the default logo, else None"""
+    # Use customer-specific logo if configured, otherwise default
+    logo_path = _BASE_DIR / configured_logo_path
+    if logo_path.is_file():
+        return logo_path
+    
+    # If customer logo doesn't exist, try default logo as fallback
+    if configured_logo_path != 'static/logo.png':
+        logo_path = _BASE_DIR / "static" / "logo.png"
+        if logo_path.is_file():
+            return logo_path
+    return None
+
+@st.cache_data(ttl=60, show_spinner=False)
+def _metrics_html(metrics):
+    """Render (label, value) pairs as a single row of metric cards"""
+    cards = "".join(
+        f"<div class='metric-card'><div class='metric-label'>{html.escape(str(label))}</div>"
+        f"<div class='metric-value'>{html.escape(str(value))}</div></div>"
+        for label, value in metrics
+    )
+    return f"<div class='metric-row'>{cards}</div>"
+
+# Load customer configuration
+try:
+    customer_config = _get_customer_config()
+    customer_name = customer_config.get('customer_name', 'LinkedIn Post Generator')
+    button_color = customer_config.get('button_color', '#17A2B8')
+    # Get customer-specific logo path from config, or use default
+    configured_logo_path = customer_config.get('logo_path', 'static/logo.png')
+except Exception as e:
+    customer_name = "LinkedIn Post Generator"
+    button_color = '#17A2B8'
+    configured_logo_path = 'static/logo.png'
+
+_logo_path = _resolve_logo_path(configured_logo_path)
+_logo_exists = _logo_path is not None
+
+# Custom CSS for Admin
+st.markdown(_build_css(button_color), unsafe_allow_html=True)
 
 # Header with Logo
 if _logo_exists:
     try:
         col_logo, col_text = st.columns([1, 4])
         with col_logo:
-            st.image(_logo_path, use_container_width=True)
+            st.image(_logo_bytes(_logo_path), use_container_width=True)
         with col_text:
-            st.markdown(f"""
-                <div class="admin-header-text">
-                    <h1>⚙️ Admin Dashboard - {customer_name}</h1>
-                    <p>Manage users, posts, and view analytics</p>
-                </div>
-            """, unsafe_allow_html=True)
+            st.markdown(_build_header_html(customer_name, with_banner=False), unsafe_allow_html=True)
     except Exception:
         # Fallback if logo fails to load
-        st.markdown(f"""
-            <div class="admin-header">
-                <div class="admin-header-text">
-                    <h1>⚙️ Admin Dashboard - {customer_name}</h1>
-                    <p>Manage users, posts, and view analytics</p>
-                </div>
-            </div>
-        """, unsafe_allow_html=True)
+        st.markdown(_build_header_html(customer_name), unsafe_allow_html=True)
 else:
-    st.markdown(f"""
-        <div class="admin-header">
-            <div class="admin-header-text">
-                <h1>⚙️ Admin Dashboard - {customer_name}</h1>
-                <p>Manage users, posts, and view analytics</p>
-            </div>
-        </div>
-    """, unsafe_allow_html=True)
+    st.markdown(_build_header_html(customer_name), unsafe_allow_html=True)
+
+# Page fragments - widget interactions inside these sections rerun only the section instead
+# of the whole admin script
+@st.fragment
+def _manage_user_fragment():
+    """User Management - Manage Existing User tab body"""
+    try:
+        users_by_name = _cached_users_by_name()
+        if users_by_name:
+            usernames = tuple(users_by_name)
+            selected_username = st.selectbox("Select User", usernames)
+            # Details and stats for every listed user are fetched together, so switching users is a dict lookup
+            per_user_stats = _cached_user_stats_bulk(usernames)
+            
+            if selected_username:
+                user_info = users_by_name.get(selected_username)
+                if user_info:
+                    st.write(f"**Username:** {user_info.get('username')}")
+                    st.write(f"**Email:** {user_info.get('email', 'N/A')}")
+                    st.write(f"**Tier:** {user_info.get('tier', 'Basic')}")
+                    company_id = user_info.get('company_id')
+                    if company_id:
+                        company = _cached_company(company_id)
+                        company_name = company.get('name', 'Unknown') if company else 'Unknown'
+                        st.write(f"**Company:** {company_id} - {company_name}")
+                    else:
+                        st.write(f"**Company:** No company assigned")
+                    st.write(f"**Role:** {user_info.get('role', 'User')}")
+                    st.write(f"**Status:** {'✅ Enabled' if user_info.get('enabled', True) else '❌ Disabled'}")
+                    st.write(f"**Created:** {user_info.get('created_date', 'N/A')}")
+                    st.write(f"**Last Login:** {user_info.get('last_login', 'Never')}")
+                    user_stats = per_user_stats.get(selected_username, {})
+                    st.write(f"**Posts:** {user_stats.get('total_posts', 0)} total, "
+                             f"{user_stats.get('posts_week', 0)} this week, {user_stats.get('posts_today', 0)} today")
+                    
+                    st.divider()
+                    
+                    # Actions
+                    col1, col2, col3, col4, col5 = st.columns(5)
+                    
+                    with col1:
+                        if user_info.get('enabled', True):
+                            if st.button("🚫 Disable User", type="secondary"):
+                                success, message = enable_disable_user(selected_username, False)
+                                if success:
+                                    _clear_user_caches()
+                                    st.success(message)
+                                else:
+                                    st.error(message)
+                        else:
+                            if st.button("✅ Enable User", type="primary"):
+                                success, message = enable_disable_user(selected_username, True)
+                                if success:
+                                    _clear_user_caches()
+                                    st.success(message)
+                                else:
+                                    st.error(message)
+                    
+                    with col2:
+                        st.subheader("Change Tier")
+                        current_tier = user_info.get('tier', 'Basic')
+                        tier_index = TIER_INDEX.get(current_tier, 0)
+                        
+                        # Forms defer the rerun until submit instead of on every selection change
+                        with st.form(f"tier_form_{selected_username}"):
+                            new_tier = st.selectbox("Select Tier", TIER_OPTIONS, 
+                                                   index=tier_index,
+                                                   key=f"tier_select_{selected_username}")
+                            submitted = st.form_submit_button("Update Tier", use_container_width=True)
+                        
+                        if submitted and new_tier != current_tier:
+                            success, message = update_user_tier(selected_username, new_tier)
+                            if success:
+                                _clear_user_caches()
+                                st.success(message)
+                            else:
+                                st.error(message)
+                    
+                    with col3:
+                        st.subheader("Change Role")
+                        current_role = user_info.get('role', 'User')
+                        role_index = ROLE_INDEX.get(current_role, ROLE_INDEX["User"])
+                        
+                        with st.form(f"role_form_{selected_username}"):
+                            new_role = st.selectbox("Select Role", ROLE_OPTIONS,
+                                                   index=role_index,
+                                                   key=f"role_select_{selected_username}")
+                            submitted = st.form_submit_button("Update Role", use_container_width=True)
+                        
+                        if submitted and new_role != current_role:
+                            success, message = update_user_role(selected_username, new_role)
+                            if success:
+                                _clear_user_caches()
+                                st.success(message)
+                            else:
+                                st.error(message)
+                    
+                    with col4:
+                        st.subheader("Change Company")
+                        company_options, company_labels, company_index = _company_choices()
+                        current_company_id = user_info.get('company_id')
+                        current_company_idx = company_index.get(current_company_id, 0) if current_company_id else 0
+                        
+                        with st.form(f"company_form_{selected_username}"):
+                            new_company_idx = st.selectbox("Select Company", range(len(company_options)),
+                                                          index=current_company_idx,
+                                                          format_func=lambda x: company_labels[x],
+                                                          key=f"company_select_{selected_username}")
+                            submitted = st.form_submit_button("Update Company", use_container_width=True)
+                        new_company_id = company_options[new_company_idx] if new_company_idx > 0 else None
+                        
+                        if submitted and new_company_id != current_company_id:
+                            success, message = update_user_company(selected_username, new_company_id)
+                            if success:
+                                _clear_user_caches()
+                                st.success(message)
+                            else:
+                                st.error(message)
+                    
+                    with col5:
+                        st.subheader("Reset Password")
+                        # Use a form to handle password reset properly
+                        with st.form(f"reset_pwd_form_{selected_username}", clear_on_submit=True):
+                            new_password = st.text_input("New Password", type="password", key=f"reset_pwd_{selected_username}")
+                            submitted = st.form_submit_button("Update Password", use_container_width=True)
+                            
+                            if submitted:
+                                if new_password and new_password.strip():
+                                    success, message = update_user_password(selected_username, new_password.strip())
+                                    if success:
+                                        # Cached user records never include the password - nothing to invalidate
+                                        st.success(message)
+                                    else:
+                                        st.error(message)
+                                else:
+                                    st.error("Please enter a new password")
+                    
+                    st.divider()
+                    col_delete = st.columns(1)[0]
+                    with col_delete:
+                        st.subheader("Delete User")
+                        if st.button("🗑️ Delete User", type="secondary"):
+                            if st.session_state.get('confirm_delete') != selected_username:
+                                st.session_state['confirm_delete'] = selected_username
+                                st.warning("⚠️ Click again to confirm deletion")
+                            else:
+                                success, message = delete_user(selected_username)
+                                if success:
+                                    _clear_user_caches()
+                                    st.success(message)
+                                    st.session_state.pop('confirm_delete', None)
+                                else:
+                                    st.error(message)
+        else:
+            st.info("No users found. Create your first user in the 'Add New User' tab.")
+    except Exception as e:
+        st.error(f"Error managing users: {str(e)}")
+
+@st.fragment
+def _post_management_fragment():
+    """Post Management filters, table and post details"""
+    try:
+        total_posts, users_opt, goals_opt = _post_filter_options()
+        
+        if total_posts:
+            st.subheader(f"All Posts ({total_posts})")
+            
+            # Filters
+            col1, col2, col3 = st.columns(3)
+            with col1:
+                filter_user = st.selectbox("Filter by User", users_opt)
+            with col2:
+                filter_goal = st.selectbox("Filter by Goal", goals_opt)
+            with col3:
+                date_range = st.selectbox("Date Range", list(POST_DATE_RANGES))
+            
+            # Filters are pushed down to the data layer, which hands back only the requested page
+            filter_kwargs = {
+                'user_id': None if filter_user == "All" else filter_user,
+                'post_goal': None if filter_goal == "All" else filter_goal,
+                'since': (datetime.now() - timedelta(days=POST_DATE_RANGES[date_range])
+                          if POST_DATE_RANGES[date_range] is not None else None),
+            }
+            total_filtered = count_posts(**filter_kwargs)
+            
+            # Display filtered posts
+            if total_filtered:
+                page_count = max(1, (total_filtered + POSTS_PAGE_SIZE - 1) // POSTS_PAGE_SIZE)
+                page_number = st.number_input("Page", min_value=1, max_value=page_count, value=1)
+                page_start = (page_number - 1) * POSTS_PAGE_SIZE
+                page_posts = get_all_posts(limit=POSTS_PAGE_SIZE, offset=page_start, **filter_kwargs)
+                st.caption(f"Showing {page_start + 1}-{page_start + len(page_posts)} of {total_filtered} posts")
+                # Project before rendering - st.dataframe serializes every column it is given
+                st.dataframe(pd.DataFrame.from_records(page_posts, columns=POST_DISPLAY_COLUMNS)
+                             .convert_dtypes(dtype_backend='pyarrow'),
+                             hide_index=True, use_container_width=True)
+                
+                # Post details
+                st.subheader("Post Details")
+                selected_position = st.selectbox(
+                    "Select Post",
+                    range(len(page_posts)),
+                    format_func=lambda i: f"{page_posts[i].get('date', 'N/A')} - {page_posts[i].get('topic', 'N/A')}"
+                )
+                
+                if selected_position is not None:
+                    selected_post = page_posts[selected_position]
+                    st.write(f"**User:** {selected_post.get('user_id', 'N/A')}")
+                    st.write(f"**Date:** {selected_post.get('date', 'N/A')}")
+                    st.write(f"**Topic:** {selected_post.get('topic', 'N/A')}")
+                    st.write(f"**Goal:** {selected_post.get('post_goal', 'N/A')}")
+                    # Expander bodies are still serialized while collapsed, so gate the full payload
+                    # (including generated text) behind a toggle - it is only encoded when switched on
+                    if st.toggle("Show full post JSON", key=f"post_json_{selected_post.get('id')}"):
+                        st.json(selected_post)
+                    
+                    # Delete option
+                    if st.button("🗑️ Delete Post", type="secondary"):
+                        try:
+                            if delete_post(selected_post.get('id')):
+                                _clear_post_caches()
+                                st.success("Post deleted successfully")
+                            else:
+                                st.error("Error deleting post")
+                        except Exception as e:
+                            st.error(f"Error deleting post: {str(e)}")
+            else:
+                st.info("No posts match the filters")
+        else:
+            st.info("No posts found")
+    
+    except Exception as e:
+        st.error(f"Error loading posts: {str(e)}")
+
+def _load_analytics(refresh=False):
+    """Load/Refresh analytics button callback - marks analytics as requested, optionally dropping cached results"""
+    if refresh:
+        _cached_analytics.clear()
+        _analytics_frames.clear()
+    st.session_state.analytics_loaded = True
+
+@st.fragment
+def _analytics_fragment():
+    """Analytics charts and export"""
+    try:
+        analytics = _cached_analytics()
+        frames = _analytics_frames()
+        
+        # Charts
+        col1, col2 = st.columns(2)
+        
+        with col1:
+            st.subheader("Posts by Goal")
+            if 'posts_by_goal' in analytics:
+                st.bar_chart(frames['goal'])
+        
+        with col2:
+            st.subheader("Posts by Length")
+            if 'posts_by_length' in analytics:
+                st.bar_chart(frames['length'])
+        
+        # Time series
+        st.subheader("Posts Over Time")
+        if 'posts_over_time' in analytics:
+            st.line_chart(frames['time'])
+        
+        # Template usage
+        st.subheader("Template Usage")
+        if 'template_usage' in analytics:
+            st.bar_chart(frames['template'])
+        
+        # Export data
+        st.subheader("Export Data")
+        if st.button("📥 Download Analytics CSV"):
+            try:
+                # Cached Arrow-backed posts DataFrame, built once per posts fingerprint
+                export_posts = _cached_all_posts()
+                export_fingerprint = _posts_fingerprint(export_posts)
+                csv_bytes = _analytics_csv_bytes(export_fingerprint,
+                                                 _cached_posts_dataframe(export_fingerprint, export_posts)) if export_posts else b""
+                st.download_button(
+                    label="Download CSV",
+                    data=csv_bytes,
+                    file_name=f"analytics_{datetime.now().strftime('%Y%m%d')}.csv",
+                    mime="text/csv"
+                )
+            except Exception as e:
+                st.error(f"Error exporting data: {str(e)}")
+    
+    except Exception as e:
+        st.error(f"Error loading analytics: {str(e)}")
+
+def _update_subscription_callback(company_id, current_type, current_start, current_expiration):
+    """Update Subscription submit callback - saves the form values and leaves a message for the rerun"""
+    new_sub_type = st.session_state[f"sub_select_{company_id}"]
+    new_start = st.session_state[f"start_date_{company_id}"]
+    new_expiration = st.session_state[f"exp_date_{company_id}"]
+    
+    if (new_sub_type, new_start, new_expiration) == (current_type, current_start, current_expiration):
+        st.session_state.subscription_flash = ('info', "No changes to save")
+        return
+    
+    success, message = update_company_subscription(
+        company_id, new_sub_type,
+        new_start.isoformat(), new_expiration.isoformat()
+    )
+    if success:
+        _clear_company_caches()
+        st.session_state[f"sub_type_{company_id}"] = new_sub_type
+    st.session_state.subscription_flash = ('success' if success else 'error', message)
+
+@st.fragment
+def _manage_company_fragment():
+    """Company Management - Manage Existing Company tab body"""
+    try:
+        # Shared cached id -> company map, read once per run - the selected company is looked up
+        # in it directly, so nothing company-derived is rebuilt or re-copied on this fragment's reruns
+        companies_by_id = _cached_companies_by_id()
+        if companies_by_id:
+            # Pending delete confirmation, read once per run
+            confirmed_id = st.session_state.get('confirm_delete_company')
+            # Clear confirmation state if company was deleted (dict lookup instead of a scan)
+            if confirmed_id is not None and confirmed_id not in companies_by_id:
+                st.session_state.pop('confirm_delete_company', None)
+                confirmed_id = None
+            selected_company_id = st.selectbox("Select Company", 
+                                               list(companies_by_id),
+                                               format_func=lambda x: f"{x} - {companies_by_id[x].get('name', 'Unknown')}")
+            
+            if selected_company_id:
+                company_info = companies_by_id.get(selected_company_id)
+                if company_info:
+                    st.write(f"**Company ID:** {company_info.get('id')}")
+                    st.write(f"**Company Name:** {company_info.get('name')}")
+                    st.write(f"**Subscription Type:** {company_info.get('subscription_type', 'monthly').title()}")
+                    st.write(f"**Start Date:** {company_info.get('start_date', 'N/A')}")
+                    st.write(f"**Expiration Date:** {company_info.get('expiration_date', 'N/A')}")
+                    st.write(f"**Status:** {'✅ Active' if is_company_subscription_active(company_info) else '❌ Expired'}")
+                    st.write(f"**Enabled:** {'✅ Yes' if company_info.get('enabled', True) else '❌ No'}")
+                    
+                    st.divider()
+                    st.subheader("Company Branding")
+                    st.write("💡 Company-specific branding will override global branding for users in this company.")
+                    
+                    # Use form to prevent flashing/reruns on every input change
+                    with st.form(f"branding_form_{selected_company_id}", clear_on_submit=False):
+                        # Logo upload section
+                        st.write("**Company Logo:**")
+                        col_upload, col_preview = st.columns([2, 1])
+                        
+                        with col_upload:
+                            uploaded_logo = st.file_uploader(
+                                "Upload Company Logo",
+                                type=['png', 'jpg', 'jpeg', 'gif', 'svg'],
+                                help="Upload a logo image file (PNG, JPG, GIF, or SVG). Recommended size: max 200px width, 100px height.",
+                                key=f"logo_upload_{selected_company_id}"
+                            )
+                            
+                            # Manual path input (fallback)
+                            st.caption("Or enter logo path manually:")
+                            company_logo = st.text_input("Logo Path", 
+                                                        value=company_info.get('logo_path', '') or '',
+                                                        help="Path to company logo (e.g., 'static/htc_logo.png'). Leave empty to use global logo.",
+                                                        key=f"company_logo_{selected_company_id}")
+                        
+                        with col_preview:
+                            # Show current logo if exists
+                            current_logo_path = company_info.get('logo_path')
+                            current_logo = _logo_bytes(_BASE_DIR / current_logo_path) if current_logo_path else None
+                            if current_logo is not None:
+                                try:
+                                    st.write("**Current Logo:**")
+                                    st.image(current_logo, width=150)
+                                except Exception:
+                                    st.info("Logo file exists but cannot be displayed")
+                            
+                            # Show preview of uploaded logo
+                            if uploaded_logo:
+                                st.write("**Preview:**")
+                                st.image(uploaded_logo, width=150)
+                        
+                        # Colors - use session state to prevent reruns
+                        bg_key = f"company_bg_{selected_company_id}"
+                        btn_key = f"company_btn_{selected_company_id}"
+                        
+                        # Initialize session state if not exists
+                        if bg_key not in st.session_state:
+                            st.session_state[bg_key] = company_info.get('background_color') or '#E9F7EF'
+                        if btn_key not in st.session_state:
+                            st.session_state[btn_key] = company_info.get('button_color') or '#17A2B8'
+                        
+                        # Color pickers inside form - form prevents reruns until submit
+                        company_bg = st.color_picker("Background Color", 
+                                                     value=st.session_state[bg_key],
+                                                     help="Company-specific background color. Leave as default to use global color.",
+                                                     key=f"company_bg_picker_{selected_company_id}")
+                        
+                        company_btn = st.color_picker("Button Color", 
+                                                      value=st.session_state[btn_key],
+                                                      help="Company-specific button color. Leave as default to use global color.",
+                                                      key=f"company_btn_picker_{selected_company_id}")
+                        
+                        submitted = st.form_submit_button("💾 Save Branding", use_container_width=True)
+                        
+                        if submitted:
+                            # Handle logo upload
+                            final_logo_path = company_logo  # Default to manual path
+                            
+                            if uploaded_logo:
+                                # Save uploaded file
+                                try:
+                                    static_dir = _BASE_DIR / "static"
+                                    os.makedirs(static_dir, exist_ok=True)
+                                    
+                                    # Generate filename based on company ID and original filename
+                                    file_ext = os.path.splitext(uploaded_logo.name)[1].lower()
+                                    logo_filename = f"company_{selected_company_id}_logo{file_ext}"
+                                    logo_path = static_dir / logo_filename
+                                    
+                                    # Set the relative path
+                                    final_logo_path = f"static/{logo_filename}"
+                                    
+                                    # getbuffer() is a zero-copy view of the upload. The uploader keeps its file
+                                    # across submits, so skip the write when it matches the saved logo
+                                    upload = uploaded_logo.getbuffer()
+                                    logo_changed = _logo_bytes(logo_path) != upload
+                                    if logo_changed:
+                                        # Save the file
+                                        with open(logo_path, "wb") as f:
+                                            f.write(upload)
+                                    
+                                    # An unchanged logo is only re-synced when its last sync wasn't confirmed,
+                                    # so saving again retries a failed sync
+                                    synced_key = f"logo_synced_{logo_filename}"
+                                    if not logo_changed and st.session_state.get(synced_key):
+                                        st.info(f"ℹ️ Logo unchanged and already synced to GitHub: {final_logo_path}")
+                                    else:
+                                        # Sync logo file to GitHub
+                                        st.session_state[synced_key] = False
+                                        try:
+                                            sync_success = sync_logo_to_github(logo_path)
+                                            st.session_state[synced_key] = sync_success
+                                            if sync_success:
+                                                st.success(f"✅ Logo saved and synced to GitHub: {final_logo_path}")
+                                            else:
+                                                st.warning(f"⚠️ Logo saved to: {final_logo_path}, but GitHub sync failed. Please commit manually.")
+                                                st.info("💡 For Streamlit Cloud, the logo file must be in GitHub. You may need to commit it manually.")
+                                        except Exception as sync_error:
+                                            # If sync fails, still show the file was saved
+                                            st.warning(f"⚠️ Logo saved to: {final_logo_path}, but GitHub sync failed: {str(sync_error)}")
+                                            st.info("💡 For Streamlit Cloud, the logo file must be in GitHub. You may need to commit it manually.")
+                                except Exception as e:
+                                    st.error(f"❌ Error uploading logo: {str(e)}")
+                                    final_logo_path = company_logo  # Fall back to manual path
+                            
+                            # Update company with branding (default colors are stored as None = use global)
+                            success, message = update_company_branding(
+                                selected_company_id,
+                                logo_path=final_logo_path or None,
+                                background_color=company_bg if company_bg != '#E9F7EF' else None,
+                                button_color=company_btn if company_btn != '#17A2B8' else None,
+                            )
+                            if success:
+                                _clear_company_caches()
+                                # Update session state
+                                st.session_state[bg_key] = company_bg
+                                st.session_state[btn_key] = company_btn
+                                # No st.rerun() - caches are cleared, so the next interaction renders the saved
+                                # branding, and the upload/sync messages above stay visible
+                                st.success("✅ Company branding updated!")
+                            else:
+                                st.error(message)
+                    
+                    # Show company users
+                    st.divider()
+                    st.subheader("Company Users")
+                    # Filter the cached (password-free) user list instead of re-reading auth.json per rerun
+                    company_users = [u for u in _cached_auth_users() if u.get('company_id') == selected_company_id]
+                    if company_users:
+                        # Only the displayed fields are loaded into the frame (missing ones come through empty)
+                        df_users = _records_frame(company_users, COMPANY_USER_COLUMNS)
+                        # Arrow-backed columns go to the browser as-is instead of being converted per cell
+                        st.dataframe(df_users.convert_dtypes(dtype_backend='pyarrow'), use_container_width=True,
+                                     column_config={'enabled': st.column_config.CheckboxColumn('enabled')})
+                    else:
+                        st.info("No users assigned to this company")
+                    
+                    st.divider()
+                    
+                    # Actions
+                    col1, col2, col3, col4 = st.columns(4)
+                    
+                    with col1:
+                        if company_info.get('enabled', True):
+                            if st.button("🚫 Disable Company", type="secondary"):
+                                success, message = enable_disable_company(selected_company_id, False)
+                                if success:
+                                    _clear_company_caches()
+                                    st.success(message)
+                                else:
+                                    st.error(message)
+                        else:
+                            if st.button("✅ Enable Company", type="primary"):
+                                success, message = enable_disable_company(selected_company_id, True)
+                                if success:
+                                    _clear_company_caches()
+                                    st.success(message)
+                                else:
+                                    st.error(message)
+                    
+                    with col2:
+                        st.subheader("Update Subscription")
+                        # Use form to prevent reruns on every input change
+                        with st.form(f"subscription_form_{selected_company_id}"):
+                            sub_key = f"sub_type_{selected_company_id}"
+                            if sub_key not in st.session_state:
+                                st.session_state[sub_key] = company_info.get('subscription_type', 'monthly')
+                            
+                            st.selectbox("Subscription Type", ["monthly", "annual"],
+                                         index=0 if st.session_state[sub_key] == 'monthly' else 1,
+                                         key=f"sub_select_{selected_company_id}")
+                            
+                            # Missing dates default to today without going through the parser
+                            start_date = company_info.get('start_date')
+                            exp_date = company_info.get('expiration_date')
+                            start_date_val = _parse_iso_date(start_date) if start_date else date.today()
+                            exp_date_val = _parse_iso_date(exp_date) if exp_date else date.today()
+                            
+                            st.date_input("Start Date", value=start_date_val, key=f"start_date_{selected_company_id}")
+                            st.date_input("Expiration Date", value=exp_date_val, key=f"exp_date_{selected_company_id}")
+                            
+                            # The update runs in the submit callback, before the click's own rerun renders it
+                            st.form_submit_button("Update Subscription", use_container_width=True,
+                                                  on_click=_update_subscription_callback,
+                                                  args=(selected_company_id, company_info.get('subscription_type'),
+                                                        start_date_val, exp_date_val))
+                            
+                            flash = st.session_state.pop('subscription_flash', None)
+                            if flash:
+                                level, message = flash
+                                getattr(st, level)(message)
+                    
+                    with col3:
+                        st.subheader("Delete Company")
+                        delete_key = f"delete_company_{selected_company_id}"
+                        
+                        # Show warning if this company is pending deletion
+                        if confirmed_id == selected_company_id:
+                            st.warning("⚠️ Click the button again to confirm deletion")
+                        
+                        if st.button("🗑️ Delete Company", type="secondary", key=delete_key):
+                            if confirmed_id != selected_company_id:
+                                # First click - set confirmation
+                                st.session_state.confirm_delete_company = selected_company_id
+                            else:
+                                # Second click - actually delete
+                                success, message = delete_company(selected_company_id)
+                                if success:
+                                    # Deleting a company also unassigns its users
+                                    _clear_company_caches()
+                                    _clear_user_caches()
+                                    st.success(message)
+                                else:
+                                    st.error(message)
+                                # Clear confirmation state either way
+                                st.session_state.pop('confirm_delete_company', None)
+        else:
+            st.info("No companies found. Create your first company in the 'Add New Company' tab.")
+    except Exception as e:
+        st.error(f"Error managing companies: {str(e)}")
 
 # Sidebar navigation
 st.sidebar.title("📊 Navigation")
@@ -171,33 +1057,28 @@ page = st.sidebar.radio(
 
 # Dashboard Overview
 if page == "Dashboard":
+    import pandas as pd
     st.header("📊 Dashboard Overview")
     
     try:
         # Get statistics
-        stats = get_user_stats()  # Now uses auth.json, so total_users is correct
+        stats = _cached_user_stats()  # Now uses auth.json, so total_users is correct
         
-        col1, col2, col3, col4 = st.columns(4)
-        
-        with col1:
-            st.metric("Total Users", stats.get('total_users', 0))
-        
-        with col2:
-            st.metric("Total Posts", stats.get('total_posts', 0))
-        
-        with col3:
-            st.metric("Posts Today", stats.get('posts_today', 0))
-        
-        with col4:
-            st.metric("Posts This Week", stats.get('posts_week', 0))
+        # One markdown element for all four cards instead of four st.metric widgets
+        st.markdown(_metrics_html((
+            ("Total Users", stats.get('total_users', 0)),
+            ("Total Posts", stats.get('total_posts', 0)),
+            ("Posts Today", stats.get('posts_today', 0)),
+            ("Posts This Week", stats.get('posts_week', 0)),
+        )), unsafe_allow_html=True)
         
         # Recent activity
         st.subheader("📈 Recent Activity")
         try:
-            recent_posts = get_all_posts(limit=10)
+            # Only the displayed fields are fetched and cached, not the full post text
+            recent_posts = _cached_all_posts(limit=10, fields=tuple(RECENT_POST_COLUMNS))
             if recent_posts:
-                df_recent = pd.DataFrame(recent_posts)
-                st.dataframe(df_recent[['date', 'user_id', 'topic', 'post_goal']], use_container_width=True)
+                _render_post_rows(recent_posts, RECENT_POST_COLUMNS)
             else:
                 st.info("No recent posts")
         except Exception as e:
@@ -208,6 +1089,7 @@ if page == "Dashboard":
 
 # Company Management
 elif page == "Company Management":
+    import pandas as pd
     st.header("🏢 Company Management")
     
     # Tabs for different company management actions
@@ -216,39 +1098,44 @@ elif page == "Company Management":
     with tab1:
         st.subheader("All Companies")
         try:
-            companies = get_all_companies()
+            companies = _cached_all_companies()
             
             if companies:
+                # Few distinct plan names - categorical stores each once
+                df_companies = _records_frame(companies, COMPANY_DISPLAY_COLUMNS,
+                                              dtypes={'subscription_type': 'category'})
+                # Format dates
+                # start/created are display-only (shown as dates); expiration keeps its time for the status compare
+                _parse_date_columns(df_companies, ['start_date', 'created_date'], date_only=True)
+                _parse_date_columns(df_companies, ['expiration_date'])
+                
+                # Subscription status as one vectorized compare on the parsed expiration dates
+                # (same rule as is_subscription_active; missing/unparseable dates compare as NaT -> inactive)
+                active = (df_companies['enabled'].fillna(True).astype(bool)
+                          & (df_companies['expiration_date'] > pd.Timestamp.now()))
+                plan_counts = df_companies['subscription_type'].value_counts()
+                
                 # Statistics
                 col1, col2, col3, col4 = st.columns(4)
                 with col1:
                     st.metric("Total Companies", len(companies))
                 with col2:
-                    active_subs = len([c for c in companies if is_subscription_active(c.get('id'))])
-                    st.metric("Active Subscriptions", active_subs)
+                    st.metric("Active Subscriptions", int(active.sum()))
                 with col3:
-                    monthly_count = len([c for c in companies if c.get('subscription_type') == 'monthly'])
-                    st.metric("Monthly Plans", monthly_count)
+                    st.metric("Monthly Plans", int(plan_counts.get('monthly', 0)))
                 with col4:
-                    annual_count = len([c for c in companies if c.get('subscription_type') == 'annual'])
-                    st.metric("Annual Plans", annual_count)
+                    st.metric("Annual Plans", int(plan_counts.get('annual', 0)))
                 
                 # Display companies table
-                df_companies = pd.DataFrame(companies)
-                # Format dates
-                if 'start_date' in df_companies.columns:
-                    df_companies['start_date'] = pd.to_datetime(df_companies['start_date']).dt.strftime('%Y-%m-%d')
-                if 'expiration_date' in df_companies.columns:
-                    df_companies['expiration_date'] = pd.to_datetime(df_companies['expiration_date']).dt.strftime('%Y-%m-%d')
-                if 'created_date' in df_companies.columns:
-                    df_companies['created_date'] = pd.to_datetime(df_companies['created_date']).dt.strftime('%Y-%m-%d')
-                
-                # Add subscription status
-                df_companies['subscription_status'] = df_companies['id'].apply(
-                    lambda x: '✅ Active' if is_subscription_active(x) else '❌ Expired'
-                )
+                df_companies['subscription_status'] = active.map({True: '✅ Active', False: '❌ Expired'})
                 
-                st.dataframe(df_companies, use_container_width=True)
+                # Dates stay datetimes (sortable) and are formatted client-side
+                st.dataframe(df_companies.convert_dtypes(dtype_backend='pyarrow'), use_container_width=True,
+                             column_config={
+                                 'start_date': st.column_config.DateColumn(format='YYYY-MM-DD'),
+                                 'expiration_date': st.column_config.DateColumn(format='YYYY-MM-DD'),
+                                 'created_date': st.column_config.DateColumn(format='YYYY-MM-DD'),
+                             })
             else:
                 st.info("No companies found. Create your first company in the 'Add New Company' tab.")
         except Exception as e:
@@ -275,9 +1162,10 @@ elif page == "Company Management":
             subscription_type = st.selectbox("Subscription Type *", ["monthly", "annual"], index=0)
             
             # Calculate default expiration based on subscription type
-            default_expiration = (datetime.now() + timedelta(days=30)).date() if subscription_type == "monthly" else (datetime.now() + timedelta(days=365)).date()
+            today = datetime.now().date()
+            default_expiration = today + SUBSCRIPTION_PERIODS[subscription_type]
             
-            start_date = st.date_input("Start Date", value=datetime.now().date())
+            start_date = st.date_input("Start Date", value=today)
             expiration_date = st.date_input("Expiration Date", value=default_expiration)
             
             submitted = st.form_submit_button("Create Company", type="primary", use_container_width=True)
@@ -292,6 +1180,7 @@ elif page == "Company Management":
                         expiration_date.isoformat()
                     )
                     if success:
+                        _clear_company_caches()
                         st.session_state.company_created = True
                         st.session_state.company_created_id = company_id
                         # Don't rerun here - let clear_on_submit handle clearing the form
@@ -305,270 +1194,11 @@ elif page == "Company Management":
     
     with tab3:
         st.subheader("⚙️ Manage Existing Company")
-        try:
-            companies = get_all_companies()
-            if companies:
-                # Clear confirmation state if company was deleted
-                if 'confirm_delete_company' in st.session_state:
-                    # Check if the confirmed company still exists
-                    confirmed_id = st.session_state.confirm_delete_company
-                    if confirmed_id and not any(c['id'] == confirmed_id for c in companies):
-                        # Company was deleted, clear confirmation state
-                        st.session_state.confirm_delete_company = None
-                
-                selected_company_id = st.selectbox("Select Company", 
-                                                   [c['id'] for c in companies],
-                                                   format_func=lambda x: f"{x} - {next((c['name'] for c in companies if c['id'] == x), 'Unknown')}")
-                
-                if selected_company_id:
-                    company_info = get_company(selected_company_id)
-                    if company_info:
-                        st.write(f"**Company ID:** {company_info.get('id')}")
-                        st.write(f"**Company Name:** {company_info.get('name')}")
-                        st.write(f"**Subscription Type:** {company_info.get('subscription_type', 'monthly').title()}")
-                        st.write(f"**Start Date:** {company_info.get('start_date', 'N/A')}")
-                        st.write(f"**Expiration Date:** {company_info.get('expiration_date', 'N/A')}")
-                        st.write(f"**Status:** {'✅ Active' if is_subscription_active(selected_company_id) else '❌ Expired'}")
-                        st.write(f"**Enabled:** {'✅ Yes' if company_info.get('enabled', True) else '❌ No'}")
-                        
-                        st.divider()
-                        st.subheader("Company Branding")
-                        st.write("💡 Company-specific branding will override global branding for users in this company.")
-                        
-                        # Use form to prevent flashing/reruns on every input change
-                        with st.form(f"branding_form_{selected_company_id}", clear_on_submit=False):
-                            # Logo upload section
-                            st.write("**Company Logo:**")
-                            col_upload, col_preview = st.columns([2, 1])
-                            
-                            with col_upload:
-                                uploaded_logo = st.file_uploader(
-                                    "Upload Company Logo",
-                                    type=['png', 'jpg', 'jpeg', 'gif', 'svg'],
-                                    help="Upload a logo image file (PNG, JPG, GIF, or SVG). Recommended size: max 200px width, 100px height.",
-                                    key=f"logo_upload_{selected_company_id}"
-                                )
-                                
-                                # Manual path input (fallback)
-                                st.caption("Or enter logo path manually:")
-                                company_logo = st.text_input("Logo Path", 
-                                                            value=company_info.get('logo_path', '') or '',
-                                                            help="Path to company logo (e.g., 'static/htc_logo.png'). Leave empty to use global logo.",
-                                                            key=f"company_logo_{selected_company_id}")
-                            
-                            with col_preview:
-                                # Show current logo if exists
-                                current_logo_path = company_info.get('logo_path')
-                                if current_logo_path:
-                                    _base_dir = os.path.dirname(os.path.abspath(__file__))
-                                    _test_logo_path = os.path.join(_base_dir, current_logo_path)
-                                    if os.path.exists(_test_logo_path):
-                                        try:
-                                            st.write("**Current Logo:**")
-                                            st.image(_test_logo_path, width=150)
-                                        except Exception:
-                                            st.info("Logo file exists but cannot be displayed")
-                                
-                                # Show preview of uploaded logo
-                                if uploaded_logo:
-                                    st.write("**Preview:**")
-                                    st.image(uploaded_logo, width=150)
-                            
-                            # Colors - use session state to prevent reruns
-                            bg_key = f"company_bg_{selected_company_id}"
-                            btn_key = f"company_btn_{selected_company_id}"
-                            
-                            # Initialize session state if not exists
-                            if bg_key not in st.session_state:
-                                st.session_state[bg_key] = company_info.get('background_color') or '#E9F7EF'
-                            if btn_key not in st.session_state:
-                                st.session_state[btn_key] = company_info.get('button_color') or '#17A2B8'
-                            
-                            # Color pickers inside form - form prevents reruns until submit
-                            company_bg = st.color_picker("Background Color", 
-                                                         value=st.session_state[bg_key],
-                                                         help="Company-specific background color. Leave as default to use global color.",
-                                                         key=f"company_bg_picker_{selected_company_id}")
-                            
-                            company_btn = st.color_picker("Button Color", 
-                                                          value=st.session_state[btn_key],
-                                                          help="Company-specific button color. Leave as default to use global color.",
-                                                          key=f"company_btn_picker_{selected_company_id}")
-                            
-                            submitted = st.form_submit_button("💾 Save Branding", use_container_width=True)
-                            
-                            if submitted:
-                                # Handle logo upload
-                                final_logo_path = company_logo  # Default to manual path
-                                
-                                if uploaded_logo:
-                                    # Save uploaded file
-                                    try:
-                                        _base_dir = os.path.dirname(os.path.abspath(__file__))
-                                        static_dir = os.path.join(_base_dir, "static")
-                                        os.makedirs(static_dir, exist_ok=True)
-                                        
-                                        # Generate filename based on company ID and original filename
-                                        file_ext = os.path.splitext(uploaded_logo.name)[1].lower()
-                                        logo_filename = f"company_{selected_company_id}_logo{file_ext}"
-                                        logo_path = os.path.join(static_dir, logo_filename)
-                                        
-                                        # Save the file
-                                        with open(logo_path, "wb") as f:
-                                            f.write(uploaded_logo.getbuffer())
-                                        
-                                        # Set the relative path
-                                        final_logo_path = f"static/{logo_filename}"
-                                        
-                                        # Sync logo file to GitHub
-                                        try:
-                                            from shared_utils.data_manager import sync_logo_to_github
-                                            sync_success = sync_logo_to_github(logo_path)
-                                            if sync_success:
-                                                st.success(f"✅ Logo saved and synced to GitHub: {final_logo_path}")
-                                            else:
-                                                st.warning(f"⚠️ Logo saved to: {final_logo_path}, but GitHub sync failed. Please commit manually.")
-                                                st.info("💡 For Streamlit Cloud, the logo file must be in GitHub. You may need to commit it manually.")
-                                        except Exception as sync_error:
-                                            # If sync fails, still show the file was saved
-                                            st.warning(f"⚠️ Logo saved to: {final_logo_path}, but GitHub sync failed: {str(sync_error)}")
-                                            st.info("💡 For Streamlit Cloud, the logo file must be in GitHub. You may need to commit it manually.")
-                                    except Exception as e:
-                                        st.error(f"❌ Error uploading logo: {str(e)}")
-                                        final_logo_path = company_logo  # Fall back to manual path
-                                
-                                # Update company with branding
-                                companies = get_all_companies()
-                                for company in companies:
-                                    if company.get('id') == selected_company_id:
-                                        company['logo_path'] = final_logo_path if final_logo_path else None
-                                        company['background_color'] = company_bg if company_bg != '#E9F7EF' else None
-                                        company['button_color'] = company_btn if company_btn != '#17A2B8' else None
-                                        # Save companies
-                                        from shared_utils.data_manager import _load_json_file, _save_json_file, COMPANIES_FILE
-                                        _save_json_file(COMPANIES_FILE, companies)
-                                        
-                                        # Update session state
-                                        st.session_state[bg_key] = company_bg
-                                        st.session_state[btn_key] = company_btn
-                                
-                                st.success("✅ Company branding updated!")
-                                st.rerun()
-                        
-                        # Show company users
-                        st.divider()
-                        st.subheader("Company Users")
-                        company_users = get_company_users(selected_company_id)
-                        if company_users:
-                            df_users = pd.DataFrame(company_users)
-                            # Only select columns that exist in the DataFrame
-                            available_columns = df_users.columns.tolist()
-                            display_columns = ['username', 'email', 'tier', 'role', 'enabled']
-                            columns_to_show = [col for col in display_columns if col in available_columns]
-                            if columns_to_show:
-                                st.dataframe(df_users[columns_to_show], use_container_width=True)
-                            else:
-                                st.dataframe(df_users, use_container_width=True)
-                        else:
-                            st.info("No users assigned to this company")
-                        
-                        st.divider()
-                        
-                        # Actions
-                        col1, col2, col3, col4 = st.columns(4)
-                        
-                        with col1:
-                            if company_info.get('enabled', True):
-                                if st.button("🚫 Disable Company", type="secondary"):
-                                    success, message = enable_disable_company(selected_company_id, False)
-                                    if success:
-                                        st.success(message)
-                                    else:
-                                        st.error(message)
-                            else:
-                                if st.button("✅ Enable Company", type="primary"):
-                                    success, message = enable_disable_company(selected_company_id, True)
-                                    if success:
-                                        st.success(message)
-                                    else:
-                                        st.error(message)
-                        
-                        with col2:
-                            st.subheader("Update Subscription")
-                            # Use form to prevent reruns on every input change
-                            with st.form(f"subscription_form_{selected_company_id}"):
-                                sub_key = f"sub_type_{selected_company_id}"
-                                if sub_key not in st.session_state:
-                                    st.session_state[sub_key] = company_info.get('subscription_type', 'monthly')
-                                
-                                new_sub_type = st.selectbox("Subscription Type", ["monthly", "annual"],
-                                                           index=0 if st.session_state[sub_key] == 'monthly' else 1,
-                                                           key=f"sub_select_{selected_company_id}")
-                                
-                                start_date_str = company_info.get('start_date', datetime.now().isoformat())
-                                if 'T' in start_date_str:
-                                    start_date_val = datetime.fromisoformat(start_date_str.split('T')[0]).date()
-                                else:
-                                    start_date_val = datetime.fromisoformat(start_date_str).date()
-                                
-                                exp_date_str = company_info.get('expiration_date', datetime.now().isoformat())
-                                if 'T' in exp_date_str:
-                                    exp_date_val = datetime.fromisoformat(exp_date_str.split('T')[0]).date()
-                                else:
-                                    exp_date_val = datetime.fromisoformat(exp_date_str).date()
-                                
-                                new_start = st.date_input("Start Date", value=start_date_val, key=f"start_date_{selected_company_id}")
-                                new_expiration = st.date_input("Expiration Date", value=exp_date_val, key=f"exp_date_{selected_company_id}")
-                                
-                                submitted_sub = st.form_submit_button("Update Subscription", use_container_width=True)
-                                
-                                if submitted_sub:
-                                    if (new_sub_type != company_info.get('subscription_type') or 
-                                        new_start.isoformat() != start_date_str.split('T')[0] or
-                                        new_expiration.isoformat() != exp_date_str.split('T')[0]):
-                                        success, message = update_company_subscription(
-                                            selected_company_id, new_sub_type, 
-                                            new_start.isoformat(), new_expiration.isoformat()
-                                        )
-                                        if success:
-                                            st.success(message)
-                                            st.session_state[sub_key] = new_sub_type
-                                            st.rerun()
-                                        else:
-                                            st.error(message)
-                                    else:
-                                        st.info("No changes to save")
-                        
-                        with col3:
-                            st.subheader("Delete Company")
-                            delete_key = f"delete_company_{selected_company_id}"
-                            
-                            # Show warning if this company is pending deletion
-                            if st.session_state.get('confirm_delete_company') == selected_company_id:
-                                st.warning("⚠️ Click the button again to confirm deletion")
-                            
-                            if st.button("🗑️ Delete Company", type="secondary", key=delete_key):
-                                if st.session_state.get('confirm_delete_company') != selected_company_id:
-                                    # First click - set confirmation
-                                    st.session_state.confirm_delete_company = selected_company_id
-                                else:
-                                    # Second click - actually delete
-                                    success, message = delete_company(selected_company_id)
-                                    if success:
-                                        # Clear confirmation state
-                                        st.session_state.confirm_delete_company = None
-                                        st.success(message)
-                                    else:
-                                        st.error(message)
-                                        # Clear confirmation on error too
-                                        st.session_state.confirm_delete_company = None
-            else:
-                st.info("No companies found. Create your first company in the 'Add New Company' tab.")
-        except Exception as e:
-            st.error(f"Error managing companies: {str(e)}")
+        _manage_company_fragment()
 
 # User Management
 elif page == "User Management":
+    import pandas as pd
     st.header("👥 User Management")
     
     # Tabs for different user management actions
@@ -577,38 +1207,42 @@ elif page == "User Management":
     with tab1:
         st.subheader("All Users")
         try:
-            users = get_all_auth_users()
+            users = _cached_auth_users()
             
             if users:
-                # Statistics
+                # Only the displayed fields are loaded into the frame (missing ones come through empty)
+                df_users = _records_frame(users, USER_DISPLAY_COLUMNS)
+                
+                # Statistics - one value_counts pass per column (missing values use the defaults)
+                enabled_counts = df_users['enabled'].fillna(True).astype(bool).value_counts()
+                tier_counts = df_users['tier'].fillna('Basic').value_counts()
                 col1, col2, col3, col4, col5, col6 = st.columns(6)
                 with col1:
-                    st.metric("Total Users", len(users))
+                    st.metric("Total Users", len(df_users))
                 with col2:
-                    enabled_count = len([u for u in users if u.get('enabled', True)])
-                    st.metric("Enabled Users", enabled_count)
+                    st.metric("Enabled Users", int(enabled_counts.get(True, 0)))
                 with col3:
-                    disabled_count = len([u for u in users if not u.get('enabled', True)])
-                    st.metric("Disabled Users", disabled_count)
+                    st.metric("Disabled Users", int(enabled_counts.get(False, 0)))
                 with col4:
-                    basic_count = len([u for u in users if u.get('tier', 'Basic') == 'Basic'])
-                    st.metric("Basic Tier", basic_count)
+                    st.metric("Basic Tier", int(tier_counts.get('Basic', 0)))
                 with col5:
-                    standard_count = len([u for u in users if u.get('tier', 'Basic') == 'Standard'])
-                    st.metric("Standard Tier", standard_count)
+                    st.metric("Standard Tier", int(tier_counts.get('Standard', 0)))
                 with col6:
-                    premium_count = len([u for u in users if u.get('tier', 'Basic') == 'Premium'])
-                    st.metric("Premium Tier", premium_count)
+                    st.metric("Premium Tier", int(tier_counts.get('Premium', 0)))
                 
                 # Display users table
-                df_users = pd.DataFrame(users)
                 # Format dates
-                if 'created_date' in df_users.columns:
-                    df_users['created_date'] = pd.to_datetime(df_users['created_date']).dt.strftime('%Y-%m-%d %H:%M')
-                if 'last_login' in df_users.columns:
-                    df_users['last_login'] = df_users['last_login'].apply(lambda x: pd.to_datetime(x).strftime('%Y-%m-%d %H:%M') if x else 'Never')
+                _parse_date_columns(df_users, ['created_date', 'last_login'])
+                # Few distinct tiers and roles - categorical stores each once
+                df_users[['tier', 'role']] = df_users[['tier', 'role']].astype('category')
                 
-                st.dataframe(df_users, use_container_width=True)
+                # Dates stay datetimes (sortable) and are formatted client-side
+                st.dataframe(df_users.convert_dtypes(dtype_backend='pyarrow'), use_container_width=True,
+                             column_config={
+                                 'created_date': st.column_config.DatetimeColumn(format='YYYY-MM-DD HH:mm'),
+                                 'last_login': st.column_config.DatetimeColumn(format='YYYY-MM-DD HH:mm',
+                                                                               help="Empty if the user has never logged in"),
+                             })
             else:
                 st.info("No users found. Create your first user in the 'Add New User' tab.")
         except Exception as e:
@@ -636,15 +1270,13 @@ elif page == "User Management":
             new_email = st.text_input("Email (Optional)", help="User's email address", value="")
             
             # Company selection
-            companies = get_all_companies()
-            company_options = [None] + [c['id'] for c in companies]
-            company_labels = ["No Company"] + [f"{c['id']} - {c['name']}" for c in companies]
+            company_options, company_labels, _ = _company_choices()
             selected_company_idx = st.selectbox("Company (Optional)", range(len(company_options)), 
                                                 format_func=lambda x: company_labels[x], index=0)
             selected_company_id = company_options[selected_company_idx] if selected_company_idx > 0 else None
             
-            new_tier = st.selectbox("Tier *", ["Basic", "Standard", "Premium"], index=0, help="User subscription tier")
-            new_role = st.selectbox("Role *", ["Admin", "User", "Viewer"], index=1, help="User role within company")
+            new_tier = st.selectbox("Tier *", TIER_OPTIONS, index=TIER_INDEX["Basic"], help="User subscription tier")
+            new_role = st.selectbox("Role *", ROLE_OPTIONS, index=ROLE_INDEX["User"], help="User role within company")
             enabled = st.checkbox("Enable User", value=True, help="User can login if enabled")
             
             submitted = st.form_submit_button("Create User", type="primary", use_container_width=True)
@@ -654,6 +1286,7 @@ elif page == "User Management":
                 if new_username and new_password:
                     success, message = create_user(new_username, new_password, enabled, new_email, new_tier, selected_company_id, new_role)
                     if success:
+                        _clear_user_caches()
                         st.session_state.user_created = True
                         st.session_state.user_created_message = message
                         # Don't rerun here - let clear_on_submit handle clearing the form
@@ -667,286 +1300,57 @@ elif page == "User Management":
     
     with tab3:
         st.subheader("⚙️ Manage Existing User")
-        try:
-            users = get_all_auth_users()
-            if users:
-                selected_username = st.selectbox("Select User", [u['username'] for u in users])
-                
-                if selected_username:
-                    user_info = get_user(selected_username)
-                    if user_info:
-                        st.write(f"**Username:** {user_info.get('username')}")
-                        st.write(f"**Email:** {user_info.get('email', 'N/A')}")
-                        st.write(f"**Tier:** {user_info.get('tier', 'Basic')}")
-                        company_id = user_info.get('company_id')
-                        if company_id:
-                            company = get_company(company_id)
-                            company_name = company.get('name', 'Unknown') if company else 'Unknown'
-                            st.write(f"**Company:** {company_id} - {company_name}")
-                        else:
-                            st.write(f"**Company:** No company assigned")
-                        st.write(f"**Role:** {user_info.get('role', 'User')}")
-                        st.write(f"**Status:** {'✅ Enabled' if user_info.get('enabled', True) else '❌ Disabled'}")
-                        st.write(f"**Created:** {user_info.get('created_date', 'N/A')}")
-                        st.write(f"**Last Login:** {user_info.get('last_login', 'Never')}")
-                        
-                        st.divider()
-                        
-                        # Actions
-                        col1, col2, col3, col4, col5 = st.columns(5)
-                        
-                        with col1:
-                            if user_info.get('enabled', True):
-                                if st.button("🚫 Disable User", type="secondary"):
-                                    success, message = enable_disable_user(selected_username, False)
-                                    if success:
-                                        st.success(message)
-                                    else:
-                                        st.error(message)
-                            else:
-                                if st.button("✅ Enable User", type="primary"):
-                                    success, message = enable_disable_user(selected_username, True)
-                                    if success:
-                                        st.success(message)
-                                    else:
-                                        st.error(message)
-                        
-                        with col2:
-                            st.subheader("Change Tier")
-                            current_tier = user_info.get('tier', 'Basic')
-                            tier_options = ["Basic", "Standard", "Premium"]
-                            tier_index = tier_options.index(current_tier) if current_tier in tier_options else 0
-                            
-                            new_tier = st.selectbox("Select Tier", tier_options, 
-                                                   index=tier_index,
-                                                   key=f"tier_select_{selected_username}")
-                            
-                            if st.button("Update Tier", key=f"tier_btn_{selected_username}"):
-                                if new_tier != current_tier:
-                                    success, message = update_user_tier(selected_username, new_tier)
-                                    if success:
-                                        st.success(message)
-                                    else:
-                                        st.error(message)
-                        
-                        with col3:
-                            st.subheader("Change Role")
-                            current_role = user_info.get('role', 'User')
-                            role_options = ["Admin", "User", "Viewer"]
-                            role_index = role_options.index(current_role) if current_role in role_options else 1
-                            
-                            new_role = st.selectbox("Select Role", role_options,
-                                                   index=role_index,
-                                                   key=f"role_select_{selected_username}")
-                            
-                            if st.button("Update Role", key=f"role_btn_{selected_username}"):
-                                if new_role != current_role:
-                                    success, message = update_user_role(selected_username, new_role)
-                                    if success:
-                                        st.success(message)
-                                    else:
-                                        st.error(message)
-                        
-                        with col4:
-                            st.subheader("Change Company")
-                            companies = get_all_companies()
-                            company_options = [None] + [c['id'] for c in companies]
-                            company_labels = ["No Company"] + [f"{c['id']} - {c['name']}" for c in companies]
-                            current_company_id = user_info.get('company_id')
-                            current_company_idx = 0 if not current_company_id else (
-                                company_options.index(current_company_id) if current_company_id in company_options else 0
-                            )
-                            
-                            new_company_idx = st.selectbox("Select Company", range(len(company_options)),
-                                                          index=current_company_idx,
-                                                          format_func=lambda x: company_labels[x],
-                                                          key=f"company_select_{selected_username}")
-                            new_company_id = company_options[new_company_idx] if new_company_idx > 0 else None
-                            
-                            if st.button("Update Company", key=f"company_btn_{selected_username}"):
-                                if new_company_id != current_company_id:
-                                    success, message = update_user_company(selected_username, new_company_id)
-                                    if success:
-                                        st.success(message)
-                                    else:
-                                        st.error(message)
-                        
-                        with col5:
-                            st.subheader("Reset Password")
-                            # Use a form to handle password reset properly
-                            with st.form(f"reset_pwd_form_{selected_username}", clear_on_submit=True):
-                                new_password = st.text_input("New Password", type="password", key=f"reset_pwd_{selected_username}")
-                                submitted = st.form_submit_button("Update Password", use_container_width=True)
-                                
-                                if submitted:
-                                    if new_password and new_password.strip():
-                                        success, message = update_user_password(selected_username, new_password.strip())
-                                        if success:
-                                            st.success(message)
-                                        else:
-                                            st.error(message)
-                                    else:
-                                        st.error("Please enter a new password")
-                        
-                        st.divider()
-                        col_delete = st.columns(1)[0]
-                        with col_delete:
-                            st.subheader("Delete User")
-                            if st.button("🗑️ Delete User", type="secondary"):
-                                if st.session_state.get('confirm_delete') != selected_username:
-                                    st.session_state.confirm_delete = selected_username
-                                    st.warning("⚠️ Click again to confirm deletion")
-                                else:
-                                    success, message = delete_user(selected_username)
-                                    if success:
-                                        st.success(message)
-                                        st.session_state.confirm_delete = None
-                                    else:
-                                        st.error(message)
-            else:
-                st.info("No users found. Create your first user in the 'Add New User' tab.")
-        except Exception as e:
-            st.error(f"Error managing users: {str(e)}")
+        _manage_user_fragment()
 
 # Post Management
 elif page == "Post Management":
+    import pandas as pd
     st.header("📝 Post Management")
-    
-    try:
-        all_posts = get_all_posts()
-        
-        if all_posts:
-            st.subheader(f"All Posts ({len(all_posts)})")
-            
-            # Filters
-            col1, col2, col3 = st.columns(3)
-            with col1:
-                filter_user = st.selectbox("Filter by User", ["All"] + list(set([p.get('user_id', 'Unknown') for p in all_posts])))
-            with col2:
-                filter_goal = st.selectbox("Filter by Goal", ["All"] + list(set([p.get('post_goal', 'Unknown') for p in all_posts])))
-            with col3:
-                date_range = st.selectbox("Date Range", ["All Time", "Last 7 Days", "Last 30 Days"])
-            
-            # Apply filters
-            filtered_posts = all_posts
-            if filter_user != "All":
-                filtered_posts = [p for p in filtered_posts if p.get('user_id') == filter_user]
-            if filter_goal != "All":
-                filtered_posts = [p for p in filtered_posts if p.get('post_goal') == filter_goal]
-            if date_range != "All Time":
-                cutoff_date = datetime.now() - timedelta(days=7 if date_range == "Last 7 Days" else 30)
-                filtered_posts = [p for p in filtered_posts if datetime.fromisoformat(p.get('date', '2000-01-01')) > cutoff_date]
-            
-            # Display filtered posts
-            if filtered_posts:
-                df_posts = pd.DataFrame(filtered_posts)
-                st.dataframe(df_posts[['date', 'user_id', 'topic', 'post_goal', 'post_length']], use_container_width=True)
-                
-                # Post details
-                st.subheader("Post Details")
-                selected_idx = st.number_input("Select Post Index", min_value=0, max_value=len(filtered_posts)-1, value=0)
-                
-                if 0 <= selected_idx < len(filtered_posts):
-                    selected_post = filtered_posts[selected_idx]
-                    st.json(selected_post)
-                    
-                    # Delete option
-                    if st.button("🗑️ Delete Post", type="secondary"):
-                        try:
-                            delete_post(selected_post.get('id'))
-                            st.success("Post deleted successfully")
-                        except Exception as e:
-                            st.error(f"Error deleting post: {str(e)}")
-            else:
-                st.info("No posts match the filters")
-        else:
-            st.info("No posts found")
-    
-    except Exception as e:
-        st.error(f"Error loading posts: {str(e)}")
+    _post_management_fragment()
 
 # Analytics
 elif page == "Analytics":
+    import pandas as pd
     st.header("📊 Analytics")
-    
-    try:
-        analytics = get_analytics_data()
-        
-        # Charts
-        col1, col2 = st.columns(2)
-        
-        with col1:
-            st.subheader("Posts by Goal")
-            if 'posts_by_goal' in analytics:
-                goal_data = analytics['posts_by_goal']
-                st.bar_chart(goal_data)
-        
-        with col2:
-            st.subheader("Posts by Length")
-            if 'posts_by_length' in analytics:
-                length_data = analytics['posts_by_length']
-                st.bar_chart(length_data)
-        
-        # Time series
-        st.subheader("Posts Over Time")
-        if 'posts_over_time' in analytics:
-            time_data = pd.DataFrame(analytics['posts_by_length'])
-            st.line_chart(time_data)
-        
-        # Template usage
-        st.subheader("Template Usage")
-        if 'template_usage' in analytics:
-            template_data = analytics['template_usage']
-            st.bar_chart(template_data)
-        
-        # Export data
-        st.subheader("Export Data")
-        if st.button("📥 Download Analytics CSV"):
-            try:
-                df_analytics = pd.DataFrame(analytics.get('all_posts', []))
-                csv = df_analytics.to_csv(index=False)
-                st.download_button(
-                    label="Download CSV",
-                    data=csv,
-                    file_name=f"analytics_{datetime.now().strftime('%Y%m%d')}.csv",
-                    mime="text/csv"
-                )
-            except Exception as e:
-                st.error(f"Error exporting data: {str(e)}")
-    
-    except Exception as e:
-        st.error(f"Error loading analytics: {str(e)}")
+    # The aggregation only runs once asked for in this session; after that it is served from the cache
+    if st.session_state.get('analytics_loaded'):
+        st.button("🔄 Refresh analytics", on_click=_load_analytics, kwargs={'refresh': True})
+        _analytics_fragment()
+    else:
+        st.button("📊 Load analytics", type="primary", on_click=_load_analytics)
 
 # Configuration
 elif page == "Configuration":
     st.header("⚙️ Configuration")
     
     try:
-        config = load_customer_config()
+        config = _get_customer_config()
         
         st.subheader("Customer Configuration")
         
-        customer_name = st.text_input("Customer Name", value=config.get('customer_name', ''))
-        background_color = st.color_picker("Background Color", value=config.get('background_color', '#E9F7EF'))
-        button_color = st.color_picker("Button Color", value=config.get('button_color', '#17A2B8'))
-        logo_path = st.text_input("Logo Path", value=config.get('logo_path', 'static/logo.png'), 
-                                  help="Path to customer logo file (relative to LIPG Cloud folder, e.g., 'static/customer_logo.png')")
+        # Batch the edits into one rerun on save rather than one per keystroke/color change
+        with st.form("customer_config_form"):
+            customer_name = st.text_input("Customer Name", value=config.get('customer_name', ''))
+            background_color = st.color_picker("Background Color", value=config.get('background_color', '#E9F7EF'))
+            button_color = st.color_picker("Button Color", value=config.get('button_color', '#17A2B8'))
+            logo_path = st.text_input("Logo Path", value=config.get('logo_path', 'static/logo.png'), 
+                                      help="Path to customer logo file (relative to LIPG Cloud folder, e.g., 'static/customer_logo.png')")
+            save_config = st.form_submit_button("💾 Save Configuration")
         
         # Show current logo if it exists
         if logo_path:
-            _base_dir = os.path.dirname(os.path.abspath(__file__))
-            _test_logo_path = os.path.join(_base_dir, logo_path)
-            if os.path.exists(_test_logo_path):
+            config_logo = _logo_bytes(_BASE_DIR / logo_path)
+            if config_logo is not None:
                 st.success(f"✅ Logo file found at: {logo_path}")
                 try:
-                    st.image(_test_logo_path, width=200)
+                    st.image(config_logo, width=200)
                 except Exception as e:
                     st.warning(f"⚠️ Could not display logo: {str(e)}")
             else:
                 st.warning(f"⚠️ Logo file not found at: {logo_path}")
                 st.info("💡 Place the customer logo file in the specified location, or use 'static/logo.png' for default logo.")
         
-        if st.button("💾 Save Configuration"):
+        if save_config:
             new_config = {
                 'customer_name': customer_name,
                 'background_color': background_color,
@@ -954,8 +1358,12 @@ elif page == "Configuration":
                 'logo_path': logo_path
             }
             try:
-                save_customer_config(new_config)
-                st.success("✅ Configuration saved successfully!")
+                if save_customer_config(new_config):
+                    _get_customer_config.clear()
+                    _resolve_logo_path.clear()
+                    st.success("✅ Configuration saved successfully!")
+                else:
+                    st.error("Error saving configuration")
             except Exception as e:
                 st.error(f"Error saving configuration: {str(e)}")
         
@@ -965,15 +1373,18 @@ elif page == "Configuration":
         st.code("OPENAI_API_KEY=your-api-key-here")
         
         st.divider()
-        st.subheader("Current Configuration")
-        st.json(config)
+        with st.expander("Current Configuration", expanded=False):
+            st.json(config)
     
     except Exception as e:
         st.error(f"Error loading configuration: {str(e)}")
 
 # Logout
-st.sidebar.divider()
-if st.sidebar.button("🚪 Logout"):
+def _logout():
+    """Button callback - runs before the click's rerun, which then stops at the login gate"""
+    st.session_state.clear()
     st.session_state.admin_authenticated = False
-    st.rerun()
+
+st.sidebar.divider()
+st.sidebar.button("🚪 Logout", on_click=_logout)
 
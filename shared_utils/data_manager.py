@@ -4,15 +4,22 @@ Handles database operations for posts and users
 """
 
 import json
-import csv
 import os
 import subprocess
 from datetime import datetime, timedelta
 from pathlib import Path
 import logging
-from functools import lru_cache
+import heapq
+from collections import Counter
+from operator import itemgetter
 from time import time
 
+try:
+    # Optional - a C JSON codec, noticeably faster than the standard library on large stores
+    import orjson
+except ImportError:
+    orjson = None
+
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 
@@ -76,6 +83,23 @@ def _invalidate_cache(filepath=None):
         _file_cache.clear()
 
 
+def _read_json(filepath):
+    """Parse a JSON file (orjson if installed, else the standard library)"""
+    if orjson is not None:
+        with open(filepath, 'rb') as f:
+            return orjson.loads(f.read())
+    with open(filepath, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+def _write_json(filepath, data):
+    """Write data as indented UTF-8 JSON (orjson if installed, else the standard library)"""
+    if orjson is not None:
+        with open(filepath, 'wb') as f:
+            f.write(orjson.dumps(data, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS))
+        return
+    with open(filepath, 'w', encoding='utf-8') as f:
+        json.dump(data, f, indent=2, ensure_ascii=False)
+
 def _load_json_file(filepath, use_cache=True):
     """Load JSON data from file with optional caching"""
     # Check cache first
@@ -86,17 +110,16 @@ def _load_json_file(filepath, use_cache=True):
     
     if filepath.exists():
         try:
-            with open(filepath, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-                # Ensure we return a list if data is not a list
-                if not isinstance(data, list):
-                    data = []
-                # Cache the data
-                if use_cache:
-                    _set_cached_data(filepath, data)
-                return data
+            data = _read_json(filepath)
+            # Ensure we return a list if data is not a list
+            if not isinstance(data, list):
+                data = []
+            # Cache the data
+            if use_cache:
+                _set_cached_data(filepath, data)
+            return data
         except json.JSONDecodeError:
-            # If file is corrupted, return empty list
+            # If file is corrupted, return empty list (orjson.JSONDecodeError subclasses this too)
             logging.warning(f"JSON file {filepath} is corrupted, returning empty list")
             return []
         except Exception as e:
@@ -116,8 +139,7 @@ def _save_json_file(filepath, data, use_cache=True):
     try:
         # Ensure directory exists
         filepath.parent.mkdir(parents=True, exist_ok=True)
-        with open(filepath, 'w', encoding='utf-8') as f:
-            json.dump(data, f, indent=2, ensure_ascii=False)
+        _write_json(filepath, data)
         logging.info(f"Successfully saved {filepath}")
         
         # Invalidate cache for this file
@@ -382,8 +404,10 @@ def save_post_to_database(user_id, topic, purpose, audience, message, tone_inten
     try:
         posts = _load_json_file(POSTS_FILE)
         
+        # Next id after the highest in use - len(posts) + 1 would reuse an id once a post was deleted
+        next_id = max((p['id'] for p in posts if isinstance(p.get('id'), int)), default=0) + 1
         post_data = {
-            "id": len(posts) + 1,
+            "id": next_id,
             "user_id": user_id,
             "date": datetime.now().isoformat(),
             "topic": topic,
@@ -421,29 +445,48 @@ def save_post_to_database(user_id, topic, purpose, audience, message, tone_inten
         logging.error(f"Error saving post to database: {str(e)}")
         return False
 
-def get_user_post_history(user_id, limit=None):
-    """Get post history for a specific user"""
+def get_user_post_history(user_id, limit=None, since=None):
+    """Get post history for a specific user, newest first, optionally only posts dated after since (datetime)"""
+    # Same filter-then-select path as get_all_posts (which also handles and logs errors)
+    return get_all_posts(limit=limit, user_id=user_id, since=since)
+
+def _filter_posts(posts, user_id=None, post_goal=None, since=None):
+    """Posts matching every given filter (since: datetime, only posts dated after it)"""
+    if user_id is not None:
+        posts = [p for p in posts if p.get('user_id') == user_id]
+    if post_goal is not None:
+        posts = [p for p in posts if p.get('post_goal') == post_goal]
+    if since is not None:
+        # ISO dates compare correctly as strings
+        since_iso = since.isoformat()
+        posts = [p for p in posts if p.get('date', '') > since_iso]
+    return posts
+
+def count_posts(user_id=None, post_goal=None, since=None):
+    """Number of posts matching the same filters as get_all_posts"""
     try:
-        posts = _load_json_file(POSTS_FILE)
-        user_posts = [p for p in posts if p.get('user_id') == user_id]
-        user_posts.sort(key=lambda x: x.get('date', ''), reverse=True)
-        
-        if limit:
-            user_posts = user_posts[:limit]
-        
-        return user_posts
+        return len(_filter_posts(_load_json_file(POSTS_FILE), user_id, post_goal, since))
     except Exception as e:
-        logging.error(f"Error getting user post history: {str(e)}")
-        return []
+        logging.error(f"Error counting posts: {str(e)}")
+        return 0
 
-def get_all_posts(limit=None):
-    """Get all posts"""
+def get_all_posts(limit=None, offset=0, user_id=None, post_goal=None, since=None, fields=None):
+    """Get all posts, newest first, optionally filtered (since: datetime), paginated and projected to fields"""
     try:
-        posts = _load_json_file(POSTS_FILE)
-        posts.sort(key=lambda x: x.get('date', ''), reverse=True)
+        # Filter before sorting so only matching posts are ordered
+        posts = _filter_posts(_load_json_file(POSTS_FILE), user_id, post_goal, since)
         
+        # New lists (never an in-place sort) so the shared cached list is never reordered
+        # while other readers use it; a page only needs its top offset+limit posts selected
+        # itemgetter is a C call per post; only legacy posts without a date need the .get() fallback
+        sort_key = itemgetter('date') if all('date' in p for p in posts) else (lambda x: x.get('date', ''))
         if limit:
-            posts = posts[:limit]
+            posts = heapq.nlargest(offset + limit, posts, key=sort_key)[offset:]
+        else:
+            posts = sorted(posts, key=sort_key, reverse=True)[offset:]
+        
+        if fields is not None:
+            posts = [{field: p.get(field) for field in fields} for p in posts]
         
         return posts
     except Exception as e:
@@ -454,13 +497,14 @@ def get_all_users():
     """Get all users with their stats (from auth.json)"""
     try:
         auth_data = _load_json_file(AUTH_FILE)
-        posts = _load_json_file(POSTS_FILE)
+        # Post counts for every user in one pass over posts
+        post_counts = Counter(p.get('user_id') for p in _load_json_file(POSTS_FILE))
         
         # Calculate post counts for each user
         for user in auth_data:
             username = user.get('username')
             if username:
-                user['post_count'] = len([p for p in posts if p.get('user_id') == username])
+                user['post_count'] = post_counts[username]
                 # Also add user_id field for backward compatibility
                 user['user_id'] = username
         
@@ -469,6 +513,22 @@ def get_all_users():
         logging.error(f"Error getting all users: {str(e)}")
         return []
 
+def _post_day(post):
+    """YYYY-MM-DD prefix of a post's ISO date - ISO dates compare correctly as strings"""
+    return post.get('date', '2000-01-01')[:10]
+
+def _stats_day_bounds():
+    """Today and the date a week ago as YYYY-MM-DD strings for comparison with _post_day"""
+    today = datetime.now().date()
+    return today.isoformat(), (today - timedelta(days=7)).isoformat()
+
+def _recent_post_counts(posts):
+    """(posts_today, posts_week) for the given posts from one pass over their dates"""
+    today, week_ago = _stats_day_bounds()
+    # Today is inside the week, so today's count only needs to look at the (small) recent list
+    recent_days = [day for day in map(_post_day, posts) if day >= week_ago]
+    return recent_days.count(today), len(recent_days)
+
 def get_user_stats(user_id=None):
     """Get statistics for a user or overall (from auth.json)"""
     try:
@@ -478,29 +538,50 @@ def get_user_stats(user_id=None):
         if user_id:
             # User-specific stats
             user_posts = [p for p in posts if p.get('user_id') == user_id]
-            today = datetime.now().date()
-            week_ago = today - timedelta(days=7)
+            posts_today, posts_week = _recent_post_counts(user_posts)
             
             return {
                 'total_posts': len(user_posts),
-                'posts_today': len([p for p in user_posts if datetime.fromisoformat(p.get('date', '2000-01-01')).date() == today]),
-                'posts_week': len([p for p in user_posts if datetime.fromisoformat(p.get('date', '2000-01-01')).date() >= week_ago]),
+                'posts_today': posts_today,
+                'posts_week': posts_week,
             }
         else:
             # Overall stats
-            today = datetime.now().date()
-            week_ago = today - timedelta(days=7)
+            posts_today, posts_week = _recent_post_counts(posts)
             
             return {
                 'total_users': len(auth_data),
                 'total_posts': len(posts),
-                'posts_today': len([p for p in posts if datetime.fromisoformat(p.get('date', '2000-01-01')).date() == today]),
-                'posts_week': len([p for p in posts if datetime.fromisoformat(p.get('date', '2000-01-01')).date() >= week_ago]),
+                'posts_today': posts_today,
+                'posts_week': posts_week,
             }
     except Exception as e:
         logging.error(f"Error getting user stats: {str(e)}")
         return {}
 
+def get_user_stats_bulk(user_ids):
+    """Get per-user statistics for several users in a single pass over posts"""
+    try:
+        posts = _load_json_file(POSTS_FILE)
+        today, week_ago = _stats_day_bounds()
+        
+        stats = {user_id: {'total_posts': 0, 'posts_today': 0, 'posts_week': 0} for user_id in user_ids}
+        for p in posts:
+            user_stats = stats.get(p.get('user_id'))
+            if user_stats is None:
+                continue
+            post_date = _post_day(p)
+            user_stats['total_posts'] += 1
+            if post_date == today:
+                user_stats['posts_today'] += 1
+            if post_date >= week_ago:
+                user_stats['posts_week'] += 1
+        
+        return stats
+    except Exception as e:
+        logging.error(f"Error getting bulk user stats: {str(e)}")
+        return {}
+
 def delete_post(post_id):
     """Delete a post by ID"""
     try:
@@ -516,21 +597,18 @@ def get_analytics_data():
     try:
         posts = _load_json_file(POSTS_FILE)
         
-        # Posts by goal
-        posts_by_goal = {}
-        posts_by_length = {}
+        # Counter tallies each histogram in C instead of a get()/store per key
+        posts_by_goal = Counter(post.get('post_goal', 'Unknown') for post in posts)
+        posts_by_length = Counter(post.get('post_length', 'Unknown') for post in posts)
+        # Daily counts keyed by the ISO date prefix (YYYY-MM-DD)
+        posts_over_time = Counter(post.get('date', '')[:10] for post in posts)
+        posts_over_time.pop('', None)
         template_usage = {}
         
-        for post in posts:
-            goal = post.get('post_goal', 'Unknown')
-            posts_by_goal[goal] = posts_by_goal.get(goal, 0) + 1
-            
-            length = post.get('post_length', 'Unknown')
-            posts_by_length[length] = posts_by_length.get(length, 0) + 1
-        
         return {
-            'posts_by_goal': posts_by_goal,
-            'posts_by_length': posts_by_length,
+            'posts_by_goal': dict(posts_by_goal),
+            'posts_by_length': dict(posts_by_length),
+            'posts_over_time': dict(sorted(posts_over_time.items())),
             'template_usage': template_usage,
             'all_posts': posts
         }
@@ -727,7 +805,7 @@ def get_all_auth_users():
     """Get all authenticated users (without passwords)"""
     try:
         auth_data = _load_json_file(AUTH_FILE)
-        posts = _load_json_file(POSTS_FILE)
+        post_counts = None
         
         # Remove passwords from response and ensure defaults exist (backward compatibility)
         users = []
@@ -746,7 +824,10 @@ def get_all_auth_users():
             # Calculate post_count if not present
             username = user_info.get('username')
             if username and 'post_count' not in user_info:
-                user_info['post_count'] = len([p for p in posts if p.get('user_id') == username])
+                if post_counts is None:
+                    # Post counts for every user in one pass over posts, only when some are missing
+                    post_counts = Counter(p.get('user_id') for p in _load_json_file(POSTS_FILE))
+                user_info['post_count'] = post_counts[username]
             
             users.append(user_info)
         return users
@@ -949,6 +1030,23 @@ def update_company_subscription(company_id, subscription_type=None, start_date=N
         logging.error(f"Error updating company subscription: {str(e)}")
         return False, f"Error updating company subscription: {str(e)}"
 
+def update_company_branding(company_id, logo_path=None, background_color=None, button_color=None):
+    """Set a company's branding (None clears a field so the global branding is used)"""
+    try:
+        companies = _load_json_file(COMPANIES_FILE)
+        company = next((c for c in companies if c.get('id') == company_id), None)
+        if company is None:
+            return False, "Company not found"
+        company['logo_path'] = logo_path
+        company['background_color'] = background_color
+        company['button_color'] = button_color
+        if not _save_json_file(COMPANIES_FILE, companies):
+            return False, "Error saving company branding"
+        return True, "Company branding updated successfully"
+    except Exception as e:
+        logging.error(f"Error updating company branding: {str(e)}")
+        return False, f"Error updating company branding: {str(e)}"
+
 def enable_disable_company(company_id, enabled):
     """Enable or disable a company"""
     try:
@@ -986,7 +1084,8 @@ def get_company_users(company_id):
     """Get all users belonging to a company"""
     try:
         auth_data = _load_json_file(AUTH_FILE)
-        company_users = [u for u in auth_data if u.get('company_id') == company_id]
+        # Copies - auth_data is the shared file cache, which must keep its passwords
+        company_users = [u.copy() for u in auth_data if u.get('company_id') == company_id]
         # Remove passwords and ensure default fields exist (backward compatibility)
         for user in company_users:
             user.pop('password', None)
@@ -999,10 +1098,9 @@ def get_company_users(company_id):
         logging.error(f"Error getting company users: {str(e)}")
         return []
 
-def is_subscription_active(company_id):
-    """Check if company subscription is active"""
+def is_company_subscription_active(company):
+    """Check if a company record's subscription is active (for callers that already hold the record)"""
     try:
-        company = get_company(company_id)
         if not company or not company.get('enabled', True):
             return False
         
@@ -1015,3 +1113,7 @@ def is_subscription_active(company_id):
     except Exception as e:
         logging.error(f"Error checking subscription status: {str(e)}")
         return False
+
+def is_subscription_active(company_id):
+    """Check if company subscription is active"""
+    return is_company_subscription_active(get_company(company_id))
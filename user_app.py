@@ -14,7 +14,9 @@ import html
 from pathlib import Path
 
 # Ensure we can import from shared_utils when app is at repo root
-sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+# App directory, resolved once and reused for sys.path and every logo path below
+_base_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(_base_dir)
 
 from shared_utils.post_generator import generate_ai_post, generate_visual_prompt
 from shared_utils.data_manager import (
@@ -60,9 +62,24 @@ if 'edited_post' not in st.session_state:
 if 'last_form_values' not in st.session_state:
     st.session_state.last_form_values = {}
 
+# Config and branding lookups run on every rerun; the admin app edits them out of
+# process, so cache with a TTL rather than for the lifetime of the server
+@st.cache_data(ttl=60, show_spinner=False)
+def _cached_customer_config():
+    """Customer configuration, cached across reruns"""
+    return load_customer_config()
+
+@st.cache_data(ttl=60, show_spinner=False)
+def _cached_user_company(username):
+    """Company record for the given user, or None, cached across reruns"""
+    user_info = get_user(username)
+    if user_info and user_info.get('company_id'):
+        return get_company(user_info.get('company_id'))
+    return None
+
 # Load customer configuration
 try:
-    customer_config = load_customer_config()
+    customer_config = _cached_customer_config()
     customer_name = customer_config.get('customer_name', 'LinkedIn Post Generator')
     background_color = customer_config.get('background_color', '#E9F7EF')
     button_color = customer_config.get('button_color', '#17A2B8')
@@ -76,7 +93,6 @@ except Exception as e:
     configured_logo_path = 'static/logo.png'
 
 # Logo logic: Different for login screen vs authenticated users
-_base_dir = os.path.dirname(os.path.abspath(__file__))
 
 # Get company name and branding for logged-in user
 display_company_name = customer_name  # Default to global customer name
@@ -88,18 +104,16 @@ company_button_color = button_color  # Default to global button color
 if st.session_state.get('authenticated') and st.session_state.get('username'):
     # AFTER LOGIN: Use company-specific logo or customer logo
     try:
-        user_info = get_user(st.session_state.username)
-        if user_info and user_info.get('company_id'):
-            company_info = get_company(user_info.get('company_id'))
-            if company_info:
-                display_company_name = company_info.get('name', customer_name)
-                # Use company-specific branding if available, otherwise use global
-                if company_info.get('logo_path'):
-                    company_logo_path = company_info.get('logo_path')
-                if company_info.get('background_color'):
-                    company_bg_color = company_info.get('background_color')
-                if company_info.get('button_color'):
-                    company_button_color = company_info.get('button_color')
+        company_info = _cached_user_company(st.session_state.username)
+        if company_info:
+            display_company_name = company_info.get('name', customer_name)
+            # Use company-specific branding if available, otherwise use global
+            if company_info.get('logo_path'):
+                company_logo_path = company_info.get('logo_path')
+            if company_info.get('background_color'):
+                company_bg_color = company_info.get('background_color')
+            if company_info.get('button_color'):
+                company_button_color = company_info.get('button_color')
     except Exception:
         # If error getting company, use default
         pass
@@ -124,14 +138,16 @@ else:
     _logo_path = os.path.join(_base_dir, "static", "logo.png")
     _logo_exists = os.path.exists(_logo_path)
 
-# Custom CSS - use company branding if available, otherwise global
-st.markdown(f"""
+@st.cache_data(show_spinner=False)
+def _build_css(background_color, button_color):
+    """Build the app CSS block for the given branding colors"""
+    return f"""
     <style>
         .main {{
-            background-color: {company_bg_color};
+            background-color: {background_color};
         }}
         .stButton > button {{
-            background-color: {company_button_color};
+            background-color: {button_color};
             color: white;
             border-radius: 5px;
             padding: 0.5rem 1rem;
@@ -139,7 +155,7 @@ st.markdown(f"""
             transition: all 0.3s ease;
         }}
         .stButton > button:hover {{
-            background-color: {company_button_color}CC;
+            background-color: {button_color}CC;
             transform: translateY(-2px);
             box-shadow: 0 4px 8px rgba(0,0,0,0.2);
         }}
@@ -200,10 +216,10 @@ st.markdown(f"""
             padding: 20px;
             border-radius: 10px;
             margin-bottom: 20px;
-            border-left: 4px solid {company_button_color};
+            border-left: 4px solid {button_color};
         }}
         .instructions-box h3 {{
-            color: {company_button_color};
+            color: {button_color};
             margin-top: 0;
         }}
         .instructions-box ol {{
@@ -215,7 +231,10 @@ st.markdown(f"""
             color: #555;
         }}
     </style>
-""", unsafe_allow_html=True)
+"""
+
+# Custom CSS - use company branding if available, otherwise global
+st.markdown(_build_css(company_bg_color, company_button_color), unsafe_allow_html=True)
 
 
 # Header with Logo inside container
@@ -299,9 +318,7 @@ with st.sidebar:
     st.markdown("<div style='text-align: center; padding: 20px 0;'>", unsafe_allow_html=True)
     try:
         # Get the absolute path to the logo file
-        current_file = os.path.abspath(__file__)
-        base_dir = os.path.dirname(current_file)
-        logo_path = os.path.join(base_dir, "static", "logo.png")
+        logo_path = os.path.join(_base_dir, "static", "logo.png")
         
         # Normalize the path (handles any path issues)
         logo_path = os.path.normpath(logo_path)
@@ -863,6 +880,14 @@ Generated by LinkedIn Post Generator
                 st.text(st.session_state.visual_prompt)
                 st.info("💡 Use this prompt with an image generation tool like DALL-E or Midjourney")
 
+# History date filter choices -> look-back in days (None = no cutoff); dict order is the option order
+HISTORY_DATE_RANGES = {"All Time": None, "Last 7 Days": 7, "Last 30 Days": 30, "Last 90 Days": 90}
+
+@st.cache_data(ttl=60, show_spinner=False)
+def _history_goal_options(fingerprint, _history):
+    """Distinct post goals for the history filter, rebuilt only when the history fingerprint changes"""
+    return ["All"] + sorted({p.get('post_goal', 'Unknown') for p in _history})
+
 # Post history
 if st.session_state.get('show_history', False):
     st.divider()
@@ -870,25 +895,36 @@ if st.session_state.get('show_history', False):
     
     if st.session_state.username:
         try:
-            history = get_user_post_history(st.session_state.username)
+            # Search and filter options
+            col_search, col_filter_goal, col_filter_date = st.columns([2, 1, 1])
+            
+            with col_search:
+                search_query = st.text_input("🔍 Search posts", placeholder="Search by topic, message, or content...", key="history_search")
+            
+            with col_filter_date:
+                filter_date = st.selectbox("Date Range", list(HISTORY_DATE_RANGES), key="history_filter_date")
+            
+            # The date range is passed to the loader, so only posts inside it are collected and ordered
+            days = HISTORY_DATE_RANGES[filter_date]
+            since = datetime.now() - timedelta(days=days) if days is not None else None
+            history = get_user_post_history(st.session_state.username, since=since)
             if history:
-                # Search and filter options
-                col_search, col_filter_goal, col_filter_date = st.columns([2, 1, 1])
-                
-                with col_search:
-                    search_query = st.text_input("🔍 Search posts", placeholder="Search by topic, message, or content...", key="history_search")
-                
                 with col_filter_goal:
-                    all_goals = ["All"] + sorted(list(set([p.get('post_goal', 'Unknown') for p in history])))
+                    # History is newest first, so count plus newest/oldest post identifies its contents
+                    history_fingerprint = (st.session_state.username, len(history),
+                                           history[0].get('id'), history[0].get('date'),
+                                           history[-1].get('id'), history[-1].get('date'))
+                    all_goals = _history_goal_options(history_fingerprint, history)
                     filter_goal = st.selectbox("Filter by Goal", all_goals, key="history_filter_goal")
                 
-                with col_filter_date:
-                    date_options = ["All Time", "Last 7 Days", "Last 30 Days", "Last 90 Days"]
-                    filter_date = st.selectbox("Date Range", date_options, key="history_filter_date")
-                
-                # Apply filters
+                # Apply filters - cheap equality checks first, so the text search
+                # (lower-casing whole posts) only runs over posts that survive them
                 filtered_history = history
                 
+                # Goal filter
+                if filter_goal != "All":
+                    filtered_history = [p for p in filtered_history if p.get('post_goal', 'Unknown') == filter_goal]
+                
                 # Search filter
                 if search_query:
                     search_lower = search_query.lower()
@@ -900,19 +936,6 @@ if st.session_state.get('show_history', False):
                             search_lower in p.get('purpose', '').lower())
                     ]
                 
-                # Goal filter
-                if filter_goal != "All":
-                    filtered_history = [p for p in filtered_history if p.get('post_goal') == filter_goal]
-                
-                # Date filter
-                if filter_date != "All Time":
-                    days = {"Last 7 Days": 7, "Last 30 Days": 30, "Last 90 Days": 90}[filter_date]
-                    cutoff_date = datetime.now() - timedelta(days=days)
-                    filtered_history = [
-                        p for p in filtered_history
-                        if datetime.fromisoformat(p.get('date', '2000-01-01').replace('Z', '+00:00').split('T')[0]) >= cutoff_date
-                    ]
-                
                 # Display results count
                 st.info(f"Showing {len(filtered_history)} of {len(history)} posts")
                 
@@ -1003,7 +1026,7 @@ if st.session_state.get('show_history', False):
                 else:
                     st.warning("No posts match your search criteria. Try adjusting your filters.")
             else:
-                st.info("No post history found.")
+                st.info("No post history found." if since is None else "No posts in this date range.")
         except Exception as e:
             st.error(f"Error loading history: {str(e)}")
     